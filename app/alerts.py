@@ -1,11 +1,24 @@
 import asyncio
-import json
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Set, Union
 import httpx
+import orjson
 from loguru import logger
 
 from app.config import settings
+from app.models import TradingSignal
+
+_UTC = timezone.utc
+
+# Discord embed fields for signal alerts: (name, value format over SignalDetails `d`, inline)
+_EMBED_FIELDS = (
+    ("Price", "${d.price:.2f}", True),
+    ("RSI", "{d.rsi:.1f}", True),
+    ("RVOL", "{d.rvol:.2f}x", True),
+    ("EMA 9/21", "${d.ema_9:.2f} / ${d.ema_21:.2f}", True),
+    ("VWAP", "${d.vwap:.2f}", True),
+    ("Volume", "{d.volume:,}", True),
+)
 
 class AlertManager:
     """Handles sending alerts to Discord and Telegram."""
@@ -16,96 +29,214 @@ class AlertManager:
         self.telegram_chat_id = settings.telegram_chat_id
         
         self.http_timeout = 10.0
+        self._json_headers = {"Content-Type": "application/json"}
+        
+        # Shared client so keep-alive connections to Discord/Telegram stay warm
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Signal alerts are queued and sent in batches (Discord accepts up to 10 embeds)
+        self.max_batch = 10
+        self.max_wait_ms = 500
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        
+        # Batches are sent concurrently, at most this many in flight at once
+        self.max_concurrent_sends = 4
+        self._send_semaphore: Optional[asyncio.Semaphore] = None
+        self._send_tasks: Set[asyncio.Task] = set()
+    
+    async def __aenter__(self):
+        await self._get_client()
+        self._ensure_flusher()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.http_timeout,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Flush queued alerts and close the shared HTTP client."""
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+        
+        # Send anything still waiting in the queue, then wait for in-flight batches
+        if self._queue is not None:
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for i in range(0, len(pending), self.max_batch):
+                self._dispatch_batch(pending[i:i + self.max_batch])
+        
+        if self._send_tasks:
+            await asyncio.gather(*self._send_tasks, return_exceptions=True)
+        
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    def _ensure_flusher(self):
+        """Start the background batch flusher if it is not running."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._send_semaphore = asyncio.Semaphore(self.max_concurrent_sends)
+        if self._flusher_task is None or self._flusher_task.done():
+            self._flusher_task = asyncio.create_task(self._flusher())
+    
+    async def _flusher(self):
+        """Collect queued signals into batches and send them."""
+        loop = asyncio.get_running_loop()
+        batch: List[TradingSignal] = []
+        
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait_ms / 1000
+                
+                # Keep draining until the batch is full or the wait window closes
+                while len(batch) < self.max_batch:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+                
+                to_send, batch = batch, []
+                self._dispatch_batch(to_send)
+                
+        except asyncio.CancelledError:
+            # Hand unsent signals back so aclose() can flush them
+            for signal in batch:
+                self._queue.put_nowait(signal)
+            raise
+    
+    def _dispatch_batch(self, signals: List[TradingSignal]):
+        """Send a batch in the background so the flusher can keep collecting."""
+        task = asyncio.create_task(self._send_signal_batch_bounded(signals))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+    
+    async def _send_signal_batch_bounded(self, signals: List[TradingSignal]):
+        """Send a batch once a concurrency slot is free."""
+        async with self._send_semaphore:
+            await self._send_signal_batch(signals)
     
-    async def send_signal_alert(self, signal: Dict[str, Any]):
-        """Send alert for a trading signal to configured channels."""
+    async def send_signal_alert(self, signal: Union[TradingSignal, Dict[str, Any]]):
+        """Queue alert for a trading signal; queued alerts are sent in batches."""
         if not any([self.discord_webhook_url, 
                    self.telegram_bot_token and self.telegram_chat_id]):
             logger.debug("No alert channels configured, skipping alert")
             return
         
         try:
-            # Create alert message
-            message = self._format_signal_message(signal)
+            if isinstance(signal, dict):
+                signal = TradingSignal.from_dict(signal)
+            self._ensure_flusher()
+            await self._queue.put(signal)
+            
+        except Exception as e:
+            logger.error(f"Error queueing signal alert: {e}")
+    
+    async def _send_signal_batch(self, signals: List[TradingSignal]):
+        """Send a batch of signal alerts as one message per configured channel."""
+        try:
+            # Create alert messages
+            messages = [self._format_signal_message(signal) for signal in signals]
             
             # Send to configured channels
             tasks = []
             
             if self.discord_webhook_url:
-                tasks.append(self._send_discord_alert(message, signal))
+                tasks.append(self._send_discord_alert(messages, signals))
             
             if self.telegram_bot_token and self.telegram_chat_id:
-                tasks.append(self._send_telegram_alert(message))
+                tasks.append(self._send_telegram_alert("\n".join(messages)))
             
             if tasks:
                 await asyncio.gather(*tasks, return_exceptions=True)
-                logger.info(f"Alert sent for {signal['symbol']} signal")
+                symbols = ", ".join(signal.symbol for signal in signals)
+                logger.info(f"Alert sent for {len(signals)} signal(s): {symbols}")
             
         except Exception as e:
-            logger.error(f"Error sending signal alert: {e}")
+            logger.error(f"Error sending signal alerts: {e}")
     
-    def _format_signal_message(self, signal: Dict[str, Any]) -> str:
+    def _format_signal_message(self, signal: TradingSignal) -> str:
         """Format signal data into a readable message."""
         try:
-            symbol = signal['symbol']
-            details = signal['details']
-            timestamp = signal['timestamp']
-            
-            # Basic message
-            message = f"🚀 **Long Signal: {symbol}**\n\n"
-            message += f"⏰ Time: {timestamp}\n"
-            message += f"💰 Price: ${details['price']:.2f}\n"
-            message += f"📊 RSI: {details['rsi']:.1f}\n"
-            message += f"📈 EMA9: ${details['ema_9']:.2f}\n"
-            message += f"📉 EMA21: ${details['ema_21']:.2f}\n"
-            message += f"🎯 VWAP: ${details['vwap']:.2f}\n"
-            message += f"📦 RVOL: {details['rvol']:.2f}x\n"
-            message += f"💹 Volume: {details['volume']:,}\n"
-            
-            return message
+            details = signal.details
+            
+            return (
+                f"🚀 **Long Signal: {signal.symbol}**\n\n"
+                f"⏰ Time: {signal.timestamp}\n"
+                f"💰 Price: ${details.price:.2f}\n"
+                f"📊 RSI: {details.rsi:.1f}\n"
+                f"📈 EMA9: ${details.ema_9:.2f}\n"
+                f"📉 EMA21: ${details.ema_21:.2f}\n"
+                f"🎯 VWAP: ${details.vwap:.2f}\n"
+                f"📦 RVOL: {details.rvol:.2f}x\n"
+                f"💹 Volume: {details.volume:,}\n"
+            )
             
         except Exception as e:
             logger.error(f"Error formatting signal message: {e}")
-            return f"Trading signal for {signal.get('symbol', 'Unknown')}"
+            return f"Trading signal for {signal.symbol}"
+    
+    def _build_discord_embed(self, message: str, signal: TradingSignal) -> Dict[str, Any]:
+        """Build the Discord embed for a single signal."""
+        details = signal.details
+        
+        return {
+            "title": f"🚀 Long Signal: {signal.symbol}",
+            "description": message,
+            "color": 0x00ff00,  # Green color
+            "timestamp": signal.timestamp,
+            "fields": [
+                {"name": name, "value": fmt.format(d=details), "inline": inline}
+                for name, fmt, inline in _EMBED_FIELDS
+            ]
+        }
     
-    async def _send_discord_alert(self, message: str, signal: Dict[str, Any]):
-        """Send alert to Discord via webhook."""
+    async def _send_discord_alert(self, messages: List[str], signals: List[TradingSignal]):
+        """Send alerts to Discord via webhook, one embed per signal."""
         try:
-            # Create Discord embed
-            embed = {
-                "title": f"🚀 Long Signal: {signal['symbol']}",
-                "description": message,
-                "color": 0x00ff00,  # Green color
-                "timestamp": signal['timestamp'],
-                "fields": []
-            }
-            
-            details = signal['details']
+            embeds = []
+            for message, signal in zip(messages, signals):
+                try:
+                    embeds.append(self._build_discord_embed(message, signal))
+                except Exception as e:
+                    logger.error(f"Error building Discord embed: {e}")
             
-            # Add fields for key metrics
-            embed["fields"].extend([
-                {"name": "Price", "value": f"${details['price']:.2f}", "inline": True},
-                {"name": "RSI", "value": f"{details['rsi']:.1f}", "inline": True},
-                {"name": "RVOL", "value": f"{details['rvol']:.2f}x", "inline": True},
-                {"name": "EMA 9/21", "value": f"${details['ema_9']:.2f} / ${details['ema_21']:.2f}", "inline": True},
-                {"name": "VWAP", "value": f"${details['vwap']:.2f}", "inline": True},
-                {"name": "Volume", "value": f"{details['volume']:,}", "inline": True},
-            ])
+            if not embeds:
+                return
             
             payload = {
                 "username": "Trading Bot",
-                "embeds": [embed]
+                "embeds": embeds
             }
             
-            async with httpx.AsyncClient(timeout=self.http_timeout) as client:
-                response = await client.post(
-                    self.discord_webhook_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
+            client = await self._get_client()
+            response = await client.post(
+                self.discord_webhook_url,
+                content=orjson.dumps(payload),
+                headers=self._json_headers
+            )
+            response.raise_for_status()
                 
-            logger.debug(f"Discord alert sent for {signal['symbol']}")
+            logger.debug(f"Discord alert sent with {len(embeds)} embeds")
             
         except Exception as e:
             logger.error(f"Error sending Discord alert: {e}")
@@ -122,9 +253,9 @@ class AlertManager:
                 "disable_web_page_preview": True
             }
             
-            async with httpx.AsyncClient(timeout=self.http_timeout) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
+            client = await self._get_client()
+            response = await client.post(url, content=orjson.dumps(payload), headers=self._json_headers)
+            response.raise_for_status()
                 
             logger.debug("Telegram alert sent")
             
@@ -141,13 +272,14 @@ class AlertManager:
             alert_message = f"📊 **Trading System Status**\n\n"
             alert_message += f"Status: {status}\n"
             alert_message += f"Message: {message}\n"
-            alert_message += f"Time: {datetime.now(timezone.utc).isoformat()}"
+            timestamp = datetime.now(_UTC).isoformat()
+            alert_message += f"Time: {timestamp}"
             
             # Send to configured channels
             tasks = []
             
             if self.discord_webhook_url:
-                tasks.append(self._send_discord_status(status, alert_message))
+                tasks.append(self._send_discord_status(status, alert_message, timestamp))
             
             if self.telegram_bot_token and self.telegram_chat_id:
                 tasks.append(self._send_telegram_alert(alert_message))
@@ -158,7 +290,7 @@ class AlertManager:
         except Exception as e:
             logger.error(f"Error sending status alert: {e}")
     
-    async def _send_discord_status(self, status: str, message: str):
+    async def _send_discord_status(self, status: str, message: str, timestamp: str = None):
         """Send status alert to Discord."""
         try:
             color = 0x00ff00 if status == "started" else 0xff9900 if status == "stopped" else 0xff0000
@@ -167,7 +299,7 @@ class AlertManager:
                 "title": "📊 Trading System Status",
                 "description": message,
                 "color": color,
-                "timestamp": datetime.now(timezone.utc).isoformat()
+                "timestamp": timestamp or datetime.now(_UTC).isoformat()
             }
             
             payload = {
@@ -175,13 +307,13 @@ class AlertManager:
                 "embeds": [embed]
             }
             
-            async with httpx.AsyncClient(timeout=self.http_timeout) as client:
-                response = await client.post(
-                    self.discord_webhook_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
+            client = await self._get_client()
+            response = await client.post(
+                self.discord_webhook_url,
+                content=orjson.dumps(payload),
+                headers=self._json_headers
+            )
+            response.raise_for_status()
                 
         except Exception as e:
             logger.error(f"Error sending Discord status alert: {e}")
@@ -1,5 +1,6 @@
 import os
 import yaml
+from functools import lru_cache
 from typing import Dict, Any
 from pathlib import Path
 from pydantic import Field
@@ -26,14 +27,22 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@lru_cache(maxsize=4)
+def _load_yaml_cached(config_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a YAML file; the mtime in the key re-parses it only when it changes."""
+    with open(config_path, 'r') as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
 def load_yaml_config(config_path: str = "settings.yaml") -> Dict[str, Any]:
-    """Load configuration from YAML file."""
+    """Load configuration from YAML file (cached; treat the result as read-only)."""
     config_file = Path(config_path)
     if not config_file.exists():
         return {}
     
-    with open(config_file, 'r') as f:
-        return yaml.safe_load(f) or {}
+    return _load_yaml_cached(str(config_file), config_file.stat().st_mtime_ns)
 
 def get_config_value(key_path: str, default: Any = None) -> Any:
     """Get configuration value using dot notation (e.g., 'defaults.lookback_days')."""
@@ -1,18 +1,71 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import numpy as np
+import orjson
 import pandas as pd
 import pyarrow as pa
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import List, Optional, Dict, Any
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, Text, JSON, Boolean
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import create_engine, event, func, inspect, select, text, Column, Index, String, Integer, BigInteger, DateTime, Text, Boolean
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from sqlalchemy.pool import StaticPool
 from loguru import logger
 
 from app.config import settings
 
 Base = declarative_base()
 
+_UTC = timezone.utc
+
+class OrjsonType(TypeDecorator):
+    """JSON stored as text, serialised with orjson (handles numpy scalars too)."""
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return orjson.loads(value)
+
+class EpochMillis(TypeDecorator):
+    """UTC datetime stored as integer epoch milliseconds (naive values are taken as UTC)."""
+    impl = BigInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=_UTC)
+        return int(value.timestamp() * 1000)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value / 1000, _UTC)
+
+# Columns stored as EpochMillis; older databases hold ISO strings there until migrated
+_EPOCH_MILLIS_COLUMNS = {
+    "signals": ["ts"],
+    "reconciliations": ["reconciled_at"],
+    "backfill_queue": ["scheduled_for", "created_at"],
+}
+
 class Setting(Base):
     __tablename__ = "settings"
     
@@ -34,9 +87,9 @@ class Signal(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     symbol = Column(String, nullable=False)
     tf = Column(String, nullable=False)
-    ts = Column(DateTime(timezone=True), nullable=False)
+    ts = Column(EpochMillis, nullable=False)
     rule = Column(String, nullable=False)
-    details = Column(JSON)
+    details = Column(OrjsonType)
 
 
 class Reconciliation(Base):
@@ -47,7 +100,7 @@ class Reconciliation(Base):
     tf = Column(String, nullable=False)
     session_date = Column(String, nullable=False)  # YYYY-MM-DD
     bars_updated = Column(Integer, default=0)
-    reconciled_at = Column(DateTime(timezone=True), nullable=False)
+    reconciled_at = Column(EpochMillis, nullable=False)
     
 
 class BackfillQueue(Base):
@@ -56,25 +109,125 @@ class BackfillQueue(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     symbol = Column(String, nullable=False)
     priority = Column(Integer, default=0)  # Higher = more urgent
-    scheduled_for = Column(DateTime(timezone=True), nullable=False)
+    scheduled_for = Column(EpochMillis, nullable=False)
     status = Column(String, default="pending")  # pending, processing, completed, failed
-    created_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(EpochMillis, nullable=False)
     attempts = Column(Integer, default=0)
 
+# Composite indexes matching the filter + ORDER BY of the hot queries
+Index("ix_signals_sym_tf_ts", Signal.symbol, Signal.tf, Signal.ts.desc())
+Index("ix_recon_sym_time", Reconciliation.symbol, Reconciliation.reconciled_at.desc())
+Index(
+    "ix_backfill_pending",
+    BackfillQueue.status,
+    BackfillQueue.scheduled_for,
+    BackfillQueue.priority.desc(),
+    BackfillQueue.created_at
+)
+
+# Backends with INSERT ... ON CONFLICT (and partial indexes); others use plain ORM writes
+_ON_CONFLICT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+# At most one pending queue entry per symbol; lets enqueue be a single INSERT ... ON CONFLICT
+_BACKFILL_PENDING_WHERE = text("status = 'pending'")
+Index(
+    "uq_backfill_pending_symbol",
+    BackfillQueue.symbol,
+    unique=True,
+    sqlite_where=_BACKFILL_PENDING_WHERE,
+    postgresql_where=_BACKFILL_PENDING_WHERE
+).ddl_if(dialect=tuple(_ON_CONFLICT_INSERTS))
+
 class DatabaseManager:
     def __init__(self, db_url: str = None):
         self.db_url = db_url or settings.database_url
-        self.engine = create_engine(self.db_url)
+        self.engine = self._create_engine(self.db_url)
         Base.metadata.create_all(self.engine)
+        self._migrate_epoch_columns()
+        self._ensure_indexes()
         self.SessionLocal = sessionmaker(bind=self.engine)
+        # Thread-local session reused by read paths instead of building one per call
+        self.Session = scoped_session(self.SessionLocal)
+        
+        # Settings are read in hot loops; serve them from memory for a short TTL
+        self.settings_ttl = 30.0
+        self._settings_cache: Dict[str, Tuple[float, Optional[str]]] = {}
+    
+    @staticmethod
+    def _create_engine(db_url: str):
+        """Create the engine, tuning SQLite for concurrent reads and cheaper commits."""
+        if not db_url.startswith("sqlite"):
+            return create_engine(db_url, pool_pre_ping=True)
+        
+        engine_kwargs = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in db_url or db_url in ("sqlite://", "sqlite:///"):
+            # Share one connection so every thread sees the same in-memory database
+            engine_kwargs["poolclass"] = StaticPool
+        else:
+            engine_kwargs["pool_pre_ping"] = True
+        
+        engine = create_engine(db_url, **engine_kwargs)
+        
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.close()
+        
+        return engine
+    
+    def _migrate_epoch_columns(self):
+        """Convert datetime columns still holding ISO strings to epoch milliseconds."""
+        if self.engine.dialect.name != "sqlite":
+            return
+        
+        with self.engine.begin() as conn:
+            for table, columns in _EPOCH_MILLIS_COLUMNS.items():
+                for column in columns:
+                    result = conn.execute(text(
+                        f"UPDATE {table} SET {column} = "
+                        f"CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER) "
+                        f"WHERE typeof({column}) = 'text'"
+                    ))
+                    if result.rowcount:
+                        logger.info(f"Migrated {result.rowcount} {table}.{column} values to epoch millis")
+    
+    def _ensure_indexes(self):
+        """Create indexes added after a table was first created (create_all skips them)."""
+        # One-time migration: older databases may hold duplicate pending entries, which
+        # would block the unique index; once the index exists there is nothing to dedupe
+        existing = {index["name"] for index in inspect(self.engine).get_indexes("backfill_queue")}
+        if self.engine.dialect.name in _ON_CONFLICT_INSERTS and "uq_backfill_pending_symbol" not in existing:
+            with self.engine.begin() as conn:
+                result = conn.execute(text(
+                    "DELETE FROM backfill_queue WHERE status = 'pending' AND id NOT IN "
+                    "(SELECT MIN(id) FROM backfill_queue WHERE status = 'pending' GROUP BY symbol)"
+                ))
+                if result.rowcount:
+                    logger.info(f"Removed {result.rowcount} duplicate pending backfill_queue entries")
+        
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
     
     def get_session(self) -> Session:
         return self.SessionLocal()
     
-    def get_setting(self, key: str, default: str = None) -> str:
-        with self.get_session() as session:
+    def get_setting(self, key: str, default: str = None, use_cache: bool = True) -> str:
+        if use_cache:
+            cached = self._settings_cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                value = cached[1]
+                return value if value is not None else default
+        
+        with self.Session() as session:
             setting = session.query(Setting).filter(Setting.key == key).first()
-            return setting.value if setting else default
+            value = setting.value if setting else None
+        
+        self._settings_cache[key] = (time.monotonic() + self.settings_ttl, value)
+        return value if value is not None else default
     
     def set_setting(self, key: str, value: str):
         with self.get_session() as session:
@@ -85,16 +238,23 @@ class DatabaseManager:
                 setting = Setting(key=key, value=value)
                 session.add(setting)
             session.commit()
+        
+        self._settings_cache[key] = (time.monotonic() + self.settings_ttl, value)
     
     def get_all_settings(self) -> Dict[str, str]:
-        with self.get_session() as session:
-            settings = session.query(Setting).all()
-            return {s.key: s.value for s in settings}
+        with self.Session() as session:
+            settings = {s.key: s.value for s in session.query(Setting).all()}
+        
+        # A full read is as fresh as a per-key read, so refresh the cache with it
+        expires = time.monotonic() + self.settings_ttl
+        for key, value in settings.items():
+            self._settings_cache[key] = (expires, value)
+        return settings
     
     def update_security(self, symbol: str):
         with self.get_session() as session:
             security = session.query(Security).filter(Security.symbol == symbol).first()
-            now = datetime.now(timezone.utc)
+            now = datetime.now(_UTC)
             
             if security:
                 security.last_seen = now
@@ -109,20 +269,49 @@ class DatabaseManager:
             
             session.commit()
     
-    def add_signal(self, symbol: str, tf: str, ts: datetime, rule: str, details: Dict[str, Any]):
+    def update_securities(self, symbols: List[str]):
+        """Upsert many securities in one statement; existing rows only get last_seen bumped."""
+        if not symbols:
+            return
+        
+        now = datetime.now(_UTC)
+        symbols = list(dict.fromkeys(symbols))  # Postgres rejects upserting the same row twice in one statement
+        insert = _ON_CONFLICT_INSERTS.get(self.engine.dialect.name)
+        if insert is None:
+            with self.get_session() as session:
+                existing = {s.symbol: s for s in session.query(Security).filter(Security.symbol.in_(symbols))}
+                for symbol in symbols:
+                    if symbol in existing:
+                        existing[symbol].last_seen = now
+                    else:
+                        session.add(Security(security_id=symbol, symbol=symbol, first_seen=now, last_seen=now))
+                session.commit()
+            return
+        
+        stmt = insert(Security).values([
+            {"security_id": symbol, "symbol": symbol, "first_seen": now, "last_seen": now}
+            for symbol in symbols
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol"],
+            set_={"last_seen": stmt.excluded.last_seen}
+        )
+        
         with self.get_session() as session:
-            signal = Signal(
-                symbol=symbol,
-                tf=tf,
-                ts=ts,
-                rule=rule,
-                details=details
-            )
-            session.add(signal)
+            session.execute(stmt)
             session.commit()
     
-    def get_signals(self, symbol: str = None, tf: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+    def add_signals_bulk(self, rows: List[Dict[str, Any]]):
+        """Insert many signals in a single transaction."""
+        if not rows:
+            return
+        
         with self.get_session() as session:
+            session.bulk_insert_mappings(Signal, rows)
+            session.commit()
+    
+    def get_signals(self, symbol: str = None, tf: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        with self.Session() as session:
             query = session.query(Signal)
             
             if symbol:
@@ -144,6 +333,32 @@ class DatabaseManager:
                 for s in signals
             ]
     
+    def get_signal_by_id(self, signal_id: int) -> Optional[Dict[str, Any]]:
+        """Look up one signal by primary key."""
+        with self.Session() as session:
+            s = session.get(Signal, signal_id)
+            if s is None:
+                return None
+            
+            return {
+                "id": s.id,
+                "symbol": s.symbol,
+                "tf": s.tf,
+                "ts": s.ts.isoformat(),
+                "rule": s.rule,
+                "details": s.details
+            }
+    
+    def get_signal_counts_by_symbol(self, limit: int = 1000) -> Dict[str, int]:
+        """Count the most recent `limit` signals per symbol, busiest symbol first."""
+        with self.Session() as session:
+            recent = select(Signal.symbol).order_by(Signal.ts.desc()).limit(limit).subquery()
+            count = func.count().label("count")
+            rows = session.execute(
+                select(recent.c.symbol, count).group_by(recent.c.symbol).order_by(count.desc())
+            ).all()
+            return {symbol: n for symbol, n in rows}
+    
     def add_reconciliation(self, symbol: str, tf: str, session_date: str, bars_updated: int):
         """Record a reconciliation event."""
         with self.get_session() as session:
@@ -152,14 +367,14 @@ class DatabaseManager:
                 tf=tf,
                 session_date=session_date,
                 bars_updated=bars_updated,
-                reconciled_at=datetime.now(timezone.utc)
+                reconciled_at=datetime.now(_UTC)
             )
             session.add(reconciliation)
             session.commit()
     
     def get_last_reconcile_date(self, symbol: str = None) -> Optional[str]:
         """Get the last reconciliation date (YYYY-MM-DD) for a symbol or globally."""
-        with self.get_session() as session:
+        with self.Session() as session:
             query = session.query(Reconciliation)
             if symbol:
                 query = query.filter(Reconciliation.symbol == symbol)
@@ -169,37 +384,54 @@ class DatabaseManager:
     
     def add_to_backfill_queue(self, symbol: str, priority: int = 0, scheduled_for: datetime = None):
         """Add a symbol to the backfill queue."""
+        now = datetime.now(_UTC)
         if scheduled_for is None:
-            scheduled_for = datetime.now(timezone.utc)
+            scheduled_for = now
             
+        insert = _ON_CONFLICT_INSERTS.get(self.engine.dialect.name)
+        if insert is None:
+            with self.get_session() as session:
+                already_pending = session.query(BackfillQueue.id).filter(
+                    BackfillQueue.symbol == symbol,
+                    BackfillQueue.status == "pending"
+                ).first()
+                if not already_pending:
+                    session.add(BackfillQueue(
+                        symbol=symbol,
+                        priority=priority,
+                        scheduled_for=scheduled_for,
+                        status="pending",
+                        created_at=now
+                    ))
+                    session.commit()
+            return
+        
+        stmt = insert(BackfillQueue).values(
+            symbol=symbol,
+            priority=priority,
+            scheduled_for=scheduled_for,
+            status="pending",
+            created_at=now
+        ).on_conflict_do_nothing(
+            index_elements=["symbol"],
+            index_where=_BACKFILL_PENDING_WHERE
+        )
+        
         with self.get_session() as session:
-            # Check if already queued
-            existing = session.query(BackfillQueue).filter(
-                BackfillQueue.symbol == symbol,
-                BackfillQueue.status == "pending"
-            ).first()
-            
-            if not existing:
-                queue_item = BackfillQueue(
-                    symbol=symbol,
-                    priority=priority,
-                    scheduled_for=scheduled_for,
-                    created_at=datetime.now(timezone.utc)
-                )
-                session.add(queue_item)
-                session.commit()
+            session.execute(stmt)
+            session.commit()
     
     def get_backfill_queue_size(self) -> int:
         """Get the number of pending items in the backfill queue."""
-        with self.get_session() as session:
+        with self.Session() as session:
             return session.query(BackfillQueue).filter(
                 BackfillQueue.status == "pending"
             ).count()
     
     def get_next_backfill_symbols(self, limit: int = 10) -> List[str]:
         """Get the next symbols to backfill, respecting priority and schedule."""
-        with self.get_session() as session:
-            now = datetime.now(timezone.utc)
+        with self.Session() as session:
+            now = datetime.now(_UTC)
             items = session.query(BackfillQueue).filter(
                 BackfillQueue.status == "pending",
                 BackfillQueue.scheduled_for <= now
@@ -235,105 +467,385 @@ class DatabaseManager:
                 item.status = "completed"
                 session.commit()
 
+# Stored candle dtypes: float32 keeps ~7 significant digits (ample for equity prices)
+CANDLE_DTYPES = {'o': 'float32', 'h': 'float32', 'l': 'float32', 'c': 'float32', 'v': 'uint32'}
+_CANDLE_SCHEMA = pa.schema(
+    [pa.field('ts', pa.timestamp('ns', tz='UTC'))]
+    + [pa.field(col, pa.from_numpy_dtype(np.dtype(dtype))) for col, dtype in CANDLE_DTYPES.items()]
+)
+
+class _FrameCache:
+    """LRU of decoded fragment frames, bounded by their total in-memory size."""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[Tuple[Tuple[str, int, int], ...], Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple[Tuple[str, int, int], ...]) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                return None
+            self._frames.move_to_end(key)
+            return entry[0]
+    
+    def put(self, key: Tuple[Tuple[str, int, int], ...], df: pd.DataFrame):
+        size = int(df.memory_usage(index=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._frames:
+                return
+            self._frames[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._frames.popitem(last=False)
+                self._bytes -= evicted_size
+    
+    def evict_paths(self, paths: List[Path]):
+        """Drop every cached frame that was read from any of `paths`."""
+        paths = {str(path) for path in paths}
+        with self._lock:
+            for key in [key for key in self._frames if any(path in paths for path, _, _ in key)]:
+                self._bytes -= self._frames.pop(key)[1]
+
+# Decoded frames for recent reads; a month of 5m bars for one symbol is only a few hundred KB
+_fragment_frames = _FrameCache(max_bytes=256 * 1024 * 1024)
+
+def _read_fragments_cached(fragment_keys: Tuple[Tuple[str, int, int], ...]) -> pd.DataFrame:
+    """Decode parquet fragments, keyed on (path, mtime_ns, size) of each fragment."""
+    df = _fragment_frames.get(fragment_keys)
+    if df is None:
+        df = _decode_fragments(fragment_keys)
+        _fragment_frames.put(fragment_keys, df)
+    return df
+
+def _decode_fragments(fragment_keys: Tuple[Tuple[str, int, int], ...]) -> pd.DataFrame:
+    """Read fragments in the given order, keeping the first copy of each bar."""
+    # Explicit schema so fragments written with wider dtypes are narrowed on read
+    dataset = ds.dataset([path for path, _, _ in fragment_keys], format="parquet", schema=_CANDLE_SCHEMA)
+    df = dataset.to_table(columns=['ts'] + CandleStorage.CANDLE_COLUMNS).to_pandas()
+    df['ts'] = pd.to_datetime(df['ts'], utc=True)
+    df = df.set_index('ts')
+    
+    # Fast path: fragments that only ever appended newer bars are already strictly increasing
+    ts_values = df.index.asi8
+    if len(ts_values) < 2 or (np.diff(ts_values) > 0).all():
+        return df
+    
+    df = df[~df.index.duplicated(keep='first')]
+    return df.sort_index()
+
 class CandleStorage:
+    # Columns stored for every candle (plus the 'ts' timestamp column)
+    CANDLE_COLUMNS = ['o', 'h', 'l', 'c', 'v']
+    
     def __init__(self, data_dir: str = "data"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         self.candles_dir = self.data_dir / "candles"
         self.candles_dir.mkdir(exist_ok=True)
+        
+        # Compact a partition once it has accumulated this many append fragments
+        self.max_fragments_per_partition = 8
+        
+        # ZSTD level 1: noticeably smaller than snappy at similar CPU cost
+        self.parquet_compression = 'zstd'
+        self.parquet_compression_level = 1
+        self.parquet_row_group_size = 100_000
+        
+        # Symbols with stored candles, scanned once and kept current by write_candles
+        self.manifest_path = self.data_dir / "_symbols.json"
+        self._symbols = {p.name for p in self.candles_dir.iterdir() if p.is_dir()}
+        self._symbols_lock = threading.Lock()
+        if self._symbols != self._load_manifest():
+            self._persist_manifest()
+    
+    def _load_manifest(self) -> set:
+        """Read the persisted symbol manifest (empty if missing or unreadable)."""
+        try:
+            return set(orjson.loads(self.manifest_path.read_bytes()))
+        except Exception:
+            return set()
+    
+    def _persist_manifest(self):
+        """Write the symbol manifest atomically next to the candles directory."""
+        try:
+            tmp_path = self.manifest_path.with_suffix(".tmp")
+            tmp_path.write_bytes(orjson.dumps(sorted(self._symbols)))
+            tmp_path.replace(self.manifest_path)
+        except Exception as e:
+            logger.error(f"Error writing symbol manifest: {e}")
+    
+    def _register_symbol(self, symbol: str):
+        """Record that a symbol now has stored candles."""
+        if symbol in self._symbols:
+            return
+        with self._symbols_lock:
+            self._symbols.add(symbol)
+            self._persist_manifest()
+    
+    def _get_partition_dir(self, symbol: str, tf: str) -> Path:
+        """Root of the symbol/timeframe dataset, partitioned as year=YYYY/month=MM."""
+        return self.candles_dir / symbol / tf
+    
+    def _get_legacy_path(self, symbol: str, tf: str) -> Path:
+        """Single-file layout used before the partitioned dataset."""
+        return self.candles_dir / symbol / f"{tf}.parquet"
+    
+    def _migrate_legacy_file(self, symbol: str, tf: str):
+        """Move a single-file parquet store into the partitioned dataset."""
+        legacy_path = self._get_legacy_path(symbol, tf)
+        if not legacy_path.exists():
+            return
+        
+        try:
+            legacy = pd.read_parquet(legacy_path)
+            legacy.index = pd.to_datetime(legacy.index, utc=True)
+            legacy.index.name = 'ts'
+            if not legacy.empty:
+                legacy = self._to_storage_dtypes(legacy[self.CANDLE_COLUMNS], f"{symbol}/{tf}")
+                self._write_fragments(self._get_partition_dir(symbol, tf), legacy)
+            legacy_path.unlink()
+            logger.info(f"Migrated {len(legacy)} candles for {symbol}/{tf} to partitioned storage")
+        except Exception as e:
+            logger.error(f"Error migrating legacy parquet for {symbol}/{tf}: {e}")
+    
+    def _to_storage_dtypes(self, candles: pd.DataFrame, source: str = "") -> pd.DataFrame:
+        """Cast OHLCV columns to the stored dtypes (float32 prices, uint32 volume).
+        
+        Rows whose volume is NaN, negative or too large for uint32 are dropped
+        with a warning rather than wrapped or failing the whole frame.
+        """
+        volume = candles['v'].to_numpy(dtype='float64')
+        valid = np.isfinite(volume) & (volume >= 0) & (volume <= np.iinfo(np.uint32).max)
+        if not valid.all():
+            logger.warning(f"Dropping {int((~valid).sum())} candles for {source} with volume outside uint32 range")
+            candles = candles[valid]
+        return candles.astype(CANDLE_DTYPES)
+    
+    def _write_fragments(self, dataset_dir: Path, candles: pd.DataFrame,
+                         metadata: Dict[str, str] = None) -> List[Path]:
+        """Write candles as one new fragment file per year/month partition."""
+        written = []
+        for (year, month), part in candles.groupby([candles.index.year, candles.index.month]):
+            partition_dir = dataset_dir / f"year={year}" / f"month={month:02d}"
+            partition_dir.mkdir(parents=True, exist_ok=True)
+            
+            table = pa.Table.from_pandas(part.reset_index(), preserve_index=False)
+            if metadata:
+                table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+            
+            # Fragment names sort in write order, which read-time dedup relies on
+            fragment_path = partition_dir / f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+            self._write_parquet(table, fragment_path)
+            written.append(fragment_path)
+        return written
+    
+    def _write_leading_fragment(self, partition_dir: Path, candles: pd.DataFrame,
+                                metadata: Dict[str, str] = None) -> Path:
+        """Write candles as a fragment that reads ahead of every existing fragment in the partition.
+        
+        'base-' names sort before all 'part-' appends and newest-first among
+        themselves, so these bars win read-time dedup. The file is written under
+        a temp name and moved into place, so readers never see it half-written.
+        """
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(candles.reset_index(), preserve_index=False)
+        if metadata:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+        
+        name = f"base-{(1 << 64) - time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        tmp_path = partition_dir / f".{name}.tmp"
+        fragment_path = partition_dir / f"{name}.parquet"
+        self._write_parquet(table, tmp_path)
+        os.replace(tmp_path, fragment_path)
+        return fragment_path
+    
+    def _write_parquet(self, table: pa.Table, path: Path):
+        """Write one parquet file with the storage compression settings."""
+        pq.write_table(
+            table,
+            path,
+            compression=self.parquet_compression,
+            compression_level=self.parquet_compression_level,
+            use_dictionary=True,
+            data_page_size=1 << 20,
+            row_group_size=self.parquet_row_group_size,
+            write_statistics=True
+        )
     
-    def _get_parquet_path(self, symbol: str, tf: str) -> Path:
-        symbol_dir = self.candles_dir / symbol
-        symbol_dir.mkdir(exist_ok=True)
-        return symbol_dir / f"{tf}.parquet"
+    def _read_fragments(self, fragments: List[Path]) -> pd.DataFrame:
+        """Read fragments in write order, keeping the first-written copy of each bar.
+        
+        Decoded frames are cached by (path, mtime, size) of every fragment, so a
+        change to any fragment misses the cache. Callers get a shallow copy and
+        must not modify values in place. If a concurrent compaction removes a
+        fragment mid-read, the partitions are re-listed and the read retried.
+        """
+        for attempt in range(3):
+            if not fragments:
+                return pd.DataFrame(columns=self.CANDLE_COLUMNS)
+            
+            try:
+                fragment_keys = []
+                for path in sorted(fragments):
+                    stat = path.stat()
+                    fragment_keys.append((str(path), stat.st_mtime_ns, stat.st_size))
+                
+                return _read_fragments_cached(tuple(fragment_keys)).copy(deep=False)
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+                partition_dirs = {path.parent for path in fragments}
+                fragments = [path for partition_dir in partition_dirs for path in partition_dir.glob("*.parquet")]
+    
+    def _rewrite_partition(self, partition_dir: Path, candles: pd.DataFrame,
+                           old_fragments: List[Path], metadata: Dict[str, str] = None):
+        """Replace `old_fragments` with a single file holding `candles`.
+        
+        `old_fragments` must be exactly the files `candles` was read from, so a
+        fragment appended since then is left in place rather than lost. The new
+        file is in place before the old ones are removed, and it reads ahead of
+        them, so a crash in between leaves `candles` winning.
+        """
+        self._write_leading_fragment(partition_dir, candles, metadata)
+        for fragment in old_fragments:
+            fragment.unlink(missing_ok=True)
+        _fragment_frames.evict_paths(old_fragments)
+    
+    def compact(self, symbol: str, tf: str) -> int:
+        """Merge each partition's fragments into one deduplicated file.
+        
+        Returns:
+            Number of partitions that were compacted.
+        """
+        dataset_dir = self._get_partition_dir(symbol, tf)
+        compacted = 0
+        for partition_dir in sorted(dataset_dir.glob("year=*/month=*")):
+            fragments = list(partition_dir.glob("*.parquet"))
+            if len(fragments) < 2:
+                continue
+            self._rewrite_partition(partition_dir, self._read_fragments(fragments), fragments)
+            compacted += 1
+        
+        if compacted:
+            logger.debug(f"Compacted {compacted} partitions for {symbol}/{tf}")
+        return compacted
     
     def write_candles(self, symbol: str, tf: str, candles: pd.DataFrame, 
                      reconcile_mode: bool = False) -> int:
-        """Write candles to parquet file with enhanced deduplication and reconciliation.
+        """Write candles to the partitioned parquet dataset.
+        
+        Normal writes append a small fragment per touched partition; duplicates are
+        dropped on read (first write wins) and when the partition is compacted.
+        Reconcile mode rewrites only the touched partitions, letting the new
+        values win.
         
         Returns:
-            Number of bars that were actually updated/added.
+            Number of bars that were actually updated/added (appends count every bar written).
         """
-        parquet_path = self._get_parquet_path(symbol, tf)
         bars_changed = 0
         
         # Ensure proper schema
         if not candles.empty:
-            candles = candles.copy()
-            candles['ts'] = pd.to_datetime(candles['ts'], utc=True)
-            candles = candles.set_index('ts').sort_index()
+            self._migrate_legacy_file(symbol, tf)
+            dataset_dir = self._get_partition_dir(symbol, tf)
+            
+            # Build the typed frame in a single cast; the caller's frame is left untouched
+            ts_index = pd.DatetimeIndex(pd.to_datetime(candles['ts'], utc=True), name='ts')
+            candles = candles[self.CANDLE_COLUMNS]
+            candles.index = ts_index
+            candles = self._to_storage_dtypes(candles, f"{symbol}/{tf}")
+            if candles.empty:
+                return bars_changed
+            if not candles.index.is_monotonic_increasing:
+                candles = candles.sort_index()
             
-            # Read existing data if it exists
-            if parquet_path.exists():
+            if not reconcile_mode:
+                written = self._write_fragments(dataset_dir, candles)
+                self._register_symbol(symbol)
+                bars_changed = len(candles)
+                
+                # Fold small fragments together once a partition gets fragmented
+                for partition_dir in {p.parent for p in written}:
+                    fragments = list(partition_dir.glob("*.parquet"))
+                    if len(fragments) > self.max_fragments_per_partition:
+                        self._rewrite_partition(partition_dir, self._read_fragments(fragments), fragments)
+                
+                logger.debug(f"Appended {len(candles)} candles to {dataset_dir}")
+                return bars_changed
+            
+            metadata = {'reconciled_at': datetime.now(_UTC).isoformat()}
+            
+            for (year, month), update_data in candles.groupby([candles.index.year, candles.index.month]):
+                partition_dir = dataset_dir / f"year={year}" / f"month={month:02d}"
+                update_data = update_data[~update_data.index.duplicated(keep='last')]
+                
+                fragments = list(partition_dir.glob("*.parquet"))
                 try:
-                    existing = pd.read_parquet(parquet_path)
-                    existing.index = pd.to_datetime(existing.index, utc=True)
+                    existing = self._read_fragments(fragments)
+                    
+                    # Track what actually changed
+                    overlap_mask = update_data.index.isin(existing.index)
+                    overlap = update_data[overlap_mask]
                     
-                    if reconcile_mode:
-                        # In reconcile mode, track what actually changed
-                        original_size = len(existing)
-                        
-                        # Identify overlapping timestamps
-                        overlap_mask = candles.index.isin(existing.index)
-                        new_data = candles[~overlap_mask]
-                        update_data = candles[overlap_mask]
-                        
-                        # Count actual changes in overlapping data
-                        for ts in update_data.index:
-                            if ts in existing.index:
-                                old_row = existing.loc[ts]
-                                new_row = update_data.loc[ts]
-                                # Check if values actually changed (accounting for floating point precision)
-                                if not old_row.equals(new_row):
-                                    bars_changed += 1
-                        
-                        # Add new bars count
-                        bars_changed += len(new_data)
+                    # Compare overlapping bars in one vectorised pass
+                    old_values = existing.reindex(
+                        index=overlap.index, columns=self.CANDLE_COLUMNS
+                    ).to_numpy(dtype=float)
+                    new_values = overlap.to_numpy(dtype=float)
+                    unchanged = np.isclose(old_values, new_values, rtol=1e-9, atol=0.0, equal_nan=True)
+                    bars_changed += int((~unchanged).any(axis=1).sum())
                     
-                    # Combine and deduplicate (keep='last' for reconcile mode, 'first' for normal)
-                    combined = pd.concat([existing, candles])
-                    keep_strategy = 'last' if reconcile_mode else 'first'
-                    combined = combined[~combined.index.duplicated(keep=keep_strategy)]
-                    combined = combined.sort_index()
+                    # Add new bars count
+                    bars_changed += int((~overlap_mask).sum())
                     
-                    candles = combined
+                    # Combine and deduplicate, letting the reconciled values win
+                    combined = pd.concat([existing, update_data], copy=False, sort=False)
+                    
+                    # A pure extension of the partition needs no dedup or re-sort
+                    if not existing.empty and update_data.index[0] <= existing.index[-1]:
+                        combined = combined[~combined.index.duplicated(keep='last')].sort_index()
                     
                 except Exception as e:
+                    # Keep the existing fragments; the official bars go in a leading fragment so they still win
                     logger.warning(f"Error reading existing parquet for {symbol}/{tf}: {e}")
-                    bars_changed = len(candles)  # Assume all are new if we can't read existing
-            else:
-                bars_changed = len(candles)
-            
-            # Write to parquet with metadata if reconciling
-            metadata = {}
-            if reconcile_mode:
-                metadata['reconciled_at'] = datetime.now(timezone.utc).isoformat()
+                    bars_changed += len(update_data)  # Assume all are new if we can't read existing
+                    self._write_leading_fragment(partition_dir, update_data, metadata)
+                    continue
+                
+                self._rewrite_partition(partition_dir, combined, fragments, metadata)
             
-            # Create PyArrow table with metadata
-            table = pa.Table.from_pandas(candles)
-            if metadata:
-                # Add metadata to the schema
-                schema = table.schema
-                schema = schema.with_metadata(metadata)
-                table = table.cast(schema)
-            
-            pq.write_table(table, parquet_path, compression='snappy')
-            logger.debug(f"Wrote {len(candles)} candles to {parquet_path} (changed: {bars_changed})")
+            self._register_symbol(symbol)
+            logger.debug(f"Reconciled {len(candles)} candles in {dataset_dir} (changed: {bars_changed})")
             
         return bars_changed
     
     def read_candles(self, symbol: str, tf: str, 
                     start_time: datetime = None, 
                     end_time: datetime = None) -> pd.DataFrame:
-        """Read candles from parquet file."""
-        parquet_path = self._get_parquet_path(symbol, tf)
+        """Read candles from the partitioned parquet dataset."""
+        self._migrate_legacy_file(symbol, tf)
+        dataset_dir = self._get_partition_dir(symbol, tf)
         
-        if not parquet_path.exists():
-            return pd.DataFrame(columns=['o', 'h', 'l', 'c', 'v'])
+        if not dataset_dir.exists():
+            return pd.DataFrame(columns=self.CANDLE_COLUMNS)
         
         try:
-            df = pd.read_parquet(parquet_path)
-            df.index = pd.to_datetime(df.index, utc=True)
+            # Only partitions whose month overlaps the requested range are decoded
+            first_month = self._month_key(start_time) if start_time else None
+            last_month = self._month_key(end_time) if end_time else None
+            fragments = []
+            for partition_dir in dataset_dir.glob("year=*/month=*"):
+                month = (int(partition_dir.parent.name[5:]), int(partition_dir.name[6:]))
+                if (first_month and month < first_month) or (last_month and month > last_month):
+                    continue
+                fragments.extend(partition_dir.glob("*.parquet"))
+            
+            df = self._read_fragments(fragments)
             
             # Filter by time range if specified
             if start_time:
@@ -341,15 +853,61 @@ class CandleStorage:
             if end_time:
                 df = df[df.index <= end_time]
             
-            return df.sort_index()
+            return df
             
         except Exception as e:
             logger.error(f"Error reading candles for {symbol}/{tf}: {e}")
-            return pd.DataFrame(columns=['o', 'h', 'l', 'c', 'v'])
+            return pd.DataFrame(columns=self.CANDLE_COLUMNS)
+    
+    @staticmethod
+    def _month_key(when: datetime) -> Tuple[int, int]:
+        """(year, month) of the UTC partition holding `when`; naive datetimes are taken as UTC."""
+        ts = pd.Timestamp(when)
+        ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+        return ts.year, ts.month
+    
+    def _get_max_ts_from_footers(self, fragments: List[Path]) -> Optional[datetime]:
+        """Max 'ts' across fragments using only parquet footer statistics.
+        
+        Returns None if any fragment lacks min/max statistics for 'ts'.
+        """
+        max_ts = None
+        for fragment in fragments:
+            metadata = pq.ParquetFile(fragment).metadata
+            ts_index = metadata.schema.to_arrow_schema().get_field_index('ts')
+            if ts_index < 0:
+                return None
+            
+            for i in range(metadata.num_row_groups):
+                stats = metadata.row_group(i).column(ts_index).statistics
+                if stats is None or not stats.has_min_max:
+                    return None
+                rg_max = pd.Timestamp(stats.max)
+                rg_max = rg_max.tz_localize('UTC') if rg_max.tzinfo is None else rg_max.tz_convert('UTC')
+                if max_ts is None or rg_max > max_ts:
+                    max_ts = rg_max
+        
+        return max_ts.to_pydatetime() if max_ts is not None else None
     
     def get_last_timestamp(self, symbol: str, tf: str) -> Optional[datetime]:
         """Get the timestamp of the last candle for a symbol/timeframe."""
         try:
+            # Fast path: footer statistics of the newest partition, no column decode
+            self._migrate_legacy_file(symbol, tf)
+            partitions = sorted(self._get_partition_dir(symbol, tf).glob("year=*/month=*"))
+            for partition_dir in reversed(partitions):
+                fragments = list(partition_dir.glob("*.parquet"))
+                if not fragments:
+                    continue
+                try:
+                    last_ts = self._get_max_ts_from_footers(fragments)
+                except FileNotFoundError:
+                    # Compacted away under us; the full read below re-lists fragments
+                    break
+                if last_ts is not None:
+                    return last_ts
+                break
+            
             df = self.read_candles(symbol, tf)
             if df.empty:
                 return None
@@ -360,11 +918,7 @@ class CandleStorage:
     
     def get_symbols_with_data(self) -> List[str]:
         """Get list of symbols that have data stored."""
-        symbols = []
-        for symbol_dir in self.candles_dir.iterdir():
-            if symbol_dir.is_dir():
-                symbols.append(symbol_dir.name)
-        return symbols
+        return sorted(self._symbols)
     
     def reconcile_session_data(self, symbol: str, tf: str, official_candles: pd.DataFrame, 
                              session_date: str) -> int:
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from functools import lru_cache
 from datetime import datetime, timezone, time
 from typing import Dict, Any, Optional, List, Tuple
 from loguru import logger
@@ -7,11 +8,180 @@ from loguru import logger
 from app.config import get_config_value
 from app.data_access import db, storage
 from app.market_calendar import market_calendar
+from app.models import SignalDetails, TradingSignal
+
+def _rolling_mean(values: np.ndarray, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """Trailing mean over `window` values via cumsums; NaN until `min_periods` valid values
+    (default: the whole window) are available, same as pandas rolling(window, min_periods).mean()."""
+    if min_periods is None:
+        min_periods = window
+    n = len(values)
+    valid = ~np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    count = np.concatenate(([0], np.cumsum(valid)))
+    
+    # Windows are truncated at the start of the series, as pandas does for min_periods
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(hi - window, 0)
+    sums = csum[hi] - csum[lo]
+    counts = count[hi] - count[lo]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((counts >= min_periods) & (counts > 0), sums / counts, np.nan)
+
+def _wilder_smooth(values: np.ndarray, period: int) -> np.ndarray:
+    """Wilder's running average: seeded with the mean of the first `period` values,
+    then avg = (avg * (period - 1) + x) / period. `values` must hold at least `period` values."""
+    seeded = values[period - 1:].copy()
+    seeded[0] = values[:period].mean()
+    # The recursion is an EMA with alpha=1/period, so pandas runs it in one compiled pass
+    return pd.Series(seeded, copy=False).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+
+def _wilder_rsi(close: np.ndarray, period: int) -> np.ndarray:
+    """RSI with Wilder's smoothing of gains and losses (the TA-Lib definition)."""
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    
+    delta = np.diff(close)
+    avg_gain = _wilder_smooth(np.maximum(delta, 0.0), period)
+    avg_loss = _wilder_smooth(np.maximum(-delta, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[period:] = np.where(avg_loss > 0, 100 - 100 / (1 + avg_gain / avg_loss), 100.0)
+    return out
+
+def _rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Trailing mean and sample std (ddof=1) from one pair of cumsums; NaN unless the
+    whole window is valid, like pandas rolling(window).mean()/.std()."""
+    n = len(values)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < window or window < 2:
+        return mean, std
+    
+    valid = ~np.isnan(values)
+    # Centre on the series mean so the sum of squares does not swamp the variance
+    centre = np.nanmean(values) if valid.any() else 0.0
+    x = np.where(valid, values - centre, 0.0)
+    csum = np.cumsum(np.concatenate(([0.0], x)))
+    csum_sq = np.cumsum(np.concatenate(([0.0], x * x)))
+    count = np.cumsum(np.concatenate(([0], valid)))
+    
+    sums = csum[window:] - csum[:-window]
+    sums_sq = csum_sq[window:] - csum_sq[:-window]
+    full = (count[window:] - count[:-window]) == window
+    
+    var = np.maximum((sums_sq - sums * sums / window) / (window - 1), 0.0)
+    mean[window - 1:] = np.where(full, sums / window + centre, np.nan)
+    std[window - 1:] = np.where(full, np.sqrt(var), np.nan)
+    return mean, std
+
+# How each column is aggregated to a higher timeframe
+_BASE_AGG = {
+    'o': 'first',
+    'h': 'max',
+    'l': 'min', 
+    'c': 'last',
+    'v': 'sum'
+}
+_INDICATOR_LAST_PREFIXES = ('ema_', 'sma_', 'rsi', 'bb_', 'vwap', 'atr')  # Use last value for indicators
+_INDICATOR_MEAN = ('rvol',)  # Average for volume-based indicators
+
+@lru_cache(maxsize=32)
+def _aggregation_plan(columns: Tuple[str, ...]) -> Dict[str, str]:
+    """Aggregation per column; frames share a handful of column layouts, so this is cached."""
+    agg_dict = dict(_BASE_AGG)
+    for col in columns:
+        if col not in agg_dict:
+            if col.startswith(_INDICATOR_LAST_PREFIXES):
+                agg_dict[col] = 'last'
+            elif col in _INDICATOR_MEAN:
+                agg_dict[col] = 'mean'
+    return agg_dict
+
+def aggregate_timeframe(df: pd.DataFrame, tf: str) -> pd.DataFrame:
+    """Aggregate 5m data to higher timeframes."""
+    if df.empty:
+        return df
+    
+    logger.debug("Aggregating {} bars to {}", len(df), tf)
+    
+    # DataFrame already has timestamp as index from storage.read_candles()
+    
+    # Bucket width per timeframe; buckets are aligned to UTC midnight like pandas resample
+    tf_minutes = {
+        '15m': 15,
+        '30m': 30,
+        '1h': 60,
+        '4h': 240,
+        '1d': 1440
+    }
+    
+    if tf not in tf_minutes:
+        return df.reset_index()
+    
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    
+    # Bucket boundaries: positions where the floored timestamp changes
+    bucket_ns = tf_minutes[tf] * 60 * 1_000_000_000
+    buckets = pd.DatetimeIndex(df.index).asi8 // bucket_ns
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(df)) - 1
+    
+    agg_dict = _aggregation_plan(tuple(df.columns))
+    
+    # Reduce every column over the buckets in one pass each
+    positions = np.arange(len(df))
+    aggregated = {}
+    for col, how in agg_dict.items():
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy()
+        valid = ~pd.isna(values)
+        
+        if how == 'sum':
+            if np.issubdtype(values.dtype, np.integer):
+                aggregated[col] = np.add.reduceat(values, starts, dtype=np.int64)
+            else:
+                aggregated[col] = np.add.reduceat(np.where(valid, values, 0), starts)
+        elif how == 'max':
+            aggregated[col] = np.fmax.reduceat(values, starts)
+        elif how == 'min':
+            aggregated[col] = np.fmin.reduceat(values, starts)
+        elif how == 'mean':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                aggregated[col] = (np.add.reduceat(np.where(valid, values, 0.0), starts)
+                                   / np.add.reduceat(valid.astype(np.int64), starts))
+        else:
+            # first/last take the first/last non-missing value in each bucket
+            if how == 'first':
+                nearest = np.minimum.accumulate(np.where(valid, positions, len(df))[::-1])[::-1]
+                pick = nearest[starts]
+                found = pick <= ends
+            else:
+                nearest = np.maximum.accumulate(np.where(valid, positions, -1))
+                pick = nearest[ends]
+                found = pick >= starts
+            picked = values[np.clip(pick, 0, len(df) - 1)]
+            aggregated[col] = picked if found.all() else np.where(found, picked, np.nan)
+    
+    bucket_index = pd.to_datetime(buckets[starts] * bucket_ns, utc=True).tz_convert(df.index.tz)
+    df_agg = pd.DataFrame(aggregated, index=bucket_index.rename(df.index.name))
+    
+    # Buckets with any missing value are dropped, as before
+    df_agg = df_agg.dropna()
+    
+    # Reset index to get timestamp back as column
+    df_agg = df_agg.reset_index()
+    
+    return df_agg
 
 class IndicatorCalculator:
     def __init__(self):
         self.ema_fast = get_config_value("indicators.ema_fast", 9)
         self.ema_slow = get_config_value("indicators.ema_slow", 21)
+        self.col_ema_fast = f'ema_{self.ema_fast}'
+        self.col_ema_slow = f'ema_{self.ema_slow}'
         self.rsi_period = get_config_value("indicators.rsi_period", 14)
         self.bb_period = get_config_value("indicators.bb_period", 20)
         self.bb_std = get_config_value("indicators.bb_std", 2.0)
@@ -23,259 +193,297 @@ class IndicatorCalculator:
         if df.empty or len(df) < self.ema_slow:
             return df
         
-        df = df.copy()
+        # Indicators are collected here and attached as one float32 block at the end
+        indicators: Dict[str, Any] = {}
         
         try:
+            # Convert each input column once; the indicator methods work on these arrays
+            c = np.ascontiguousarray(df['c'].to_numpy(), dtype=np.float64)
+            h = np.ascontiguousarray(df['h'].to_numpy(), dtype=np.float64)
+            l = np.ascontiguousarray(df['l'].to_numpy(), dtype=np.float64)
+            v = np.ascontiguousarray(df['v'].to_numpy(), dtype=np.float64)
+            
             # EMAs
-            df[f'ema_{self.ema_fast}'] = self._calculate_ema(df['c'], self.ema_fast)
-            df[f'ema_{self.ema_slow}'] = self._calculate_ema(df['c'], self.ema_slow)
+            indicators[self.col_ema_fast] = self._calculate_ema(c, self.ema_fast)
+            indicators[self.col_ema_slow] = self._calculate_ema(c, self.ema_slow)
             
             # RSI
-            df['rsi'] = self._calculate_rsi(df['c'], self.rsi_period)
+            indicators['rsi'] = self._calculate_rsi(c, self.rsi_period)
             
             # Bollinger Bands
-            bb_upper, bb_middle, bb_lower = self._calculate_bollinger_bands(df['c'], self.bb_period, self.bb_std)
-            df['bb_upper'] = bb_upper
-            df['bb_middle'] = bb_middle
-            df['bb_lower'] = bb_lower
+            bb_upper, bb_middle, bb_lower = self._calculate_bollinger_bands(c, self.bb_period, self.bb_std)
+            indicators['bb_upper'] = bb_upper
+            indicators['bb_middle'] = bb_middle
+            indicators['bb_lower'] = bb_lower
             
             # Session VWAP (resets daily)
-            df['vwap'] = self._calculate_session_vwap(df)
+            indicators['vwap'] = self._session_vwap(df.index, h, l, c, v)
             
             # ATR (Average True Range)
-            df['atr'] = self._calculate_atr(df['h'], df['l'], df['c'], 14)
+            indicators['atr'] = self._calculate_atr(h, l, c, 14)
             
             # Relative Volume
-            df['rvol'] = self._calculate_rvol(df)
+            indicators['rvol'] = self._calculate_rvol(v)
             
-            logger.debug(f"Calculated indicators for {len(df)} bars")
+            logger.opt(lazy=True).debug("Calculated indicators for {} bars", lambda: len(df))
             
         except Exception as e:
             logger.error(f"Error calculating indicators: {e}")
         
-        return df
+        if not indicators:
+            return df
+        
+        indicator_block = pd.DataFrame(
+            {name: np.asarray(values, dtype=np.float32) for name, values in indicators.items()},
+            index=df.index
+        )
+        # Input columns are shared, not copied; only the new block is allocated
+        return pd.concat([df.drop(columns=indicator_block.columns, errors='ignore'), indicator_block],
+                         axis=1, copy=False)
     
-    def _calculate_ema(self, prices: pd.Series, period: int) -> pd.Series:
+    def _calculate_ema(self, prices: np.ndarray, period: int) -> np.ndarray:
         """Calculate Exponential Moving Average."""
-        return prices.ewm(span=period, adjust=False).mean()
+        return pd.Series(prices, copy=False).ewm(span=period, adjust=False).mean().to_numpy()
     
-    def _calculate_rsi(self, prices: pd.Series, period: int) -> pd.Series:
-        """Calculate Relative Strength Index."""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+    def _calculate_rsi(self, prices: np.ndarray, period: int) -> np.ndarray:
+        """Calculate Relative Strength Index with Wilder's smoothing."""
+        return _wilder_rsi(prices, period)
     
-    def _calculate_bollinger_bands(self, prices: pd.Series, period: int, std: float):
+    def _calculate_bollinger_bands(self, prices: np.ndarray, period: int,
+                                   std: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """Calculate Bollinger Bands."""
-        sma = prices.rolling(window=period).mean()
-        rolling_std = prices.rolling(window=period).std()
+        sma, rolling_std = _rolling_mean_std(prices, period)
         upper = sma + (rolling_std * std)
         lower = sma - (rolling_std * std)
         return upper, sma, lower
     
-    def _calculate_atr(self, high: pd.Series, low: pd.Series, close: pd.Series, period: int) -> pd.Series:
+    def _calculate_atr(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
         """Calculate Average True Range."""
-        prev_close = close.shift(1)
-        tr1 = high - low
-        tr2 = abs(high - prev_close)
-        tr3 = abs(low - prev_close)
-        true_range = pd.DataFrame({'tr1': tr1, 'tr2': tr2, 'tr3': tr3}).max(axis=1)
-        return true_range.rolling(window=period).mean()
+        prev_close = np.empty(len(high))
+        prev_close[0] = np.nan
+        prev_close[1:] = close[:-1]
+        
+        # fmax skips the missing previous close on the first bar, like DataFrame.max(axis=1)
+        true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        return _rolling_mean(true_range, period)
     
     def _calculate_session_vwap(self, df: pd.DataFrame) -> pd.Series:
         """Calculate session-aware VWAP that resets at 9:30 AM ET and respects extended hours setting."""
         if df.empty:
             return pd.Series(dtype=float, index=df.index)
         
+        vwap = self._session_vwap(
+            df.index,
+            df['h'].to_numpy(dtype=np.float64),
+            df['l'].to_numpy(dtype=np.float64),
+            df['c'].to_numpy(dtype=np.float64),
+            df['v'].to_numpy(dtype=np.float64) if 'v' in df.columns else None
+        )
+        return pd.Series(vwap, index=df.index)
+    
+    def _session_vwap(self, index: pd.DatetimeIndex, high: np.ndarray, low: np.ndarray,
+                      close: np.ndarray, volume: Optional[np.ndarray]) -> np.ndarray:
+        """Session VWAP over raw arrays (see _calculate_session_vwap)."""
         try:
             # Get extended hours setting
             include_extended_hours = db.get_setting('INCLUDE_EXTENDED_HOURS', 'false').lower() == 'true'
             
-            # Create a copy with timezone-aware index
-            df_copy = df.copy()
-            if df_copy.index.tz is None:
-                df_copy.index = df_copy.index.tz_localize('UTC')
+            # Session grouping and inclusion for every bar in one vectorised pass
+            session_id, include_mask = market_calendar.get_session_arrays(index, include_extended_hours)
             
-            # Initialize VWAP series
-            vwap_values = pd.Series(index=df.index, dtype=float)
+            typical_price = (high + low + close) / 3
+            pv = np.where(include_mask, typical_price * volume, 0.0)
+            vol = np.where(include_mask, volume, 0.0)
             
-            # Track session state
-            cum_pv = 0
-            cum_vol = 0
-            last_session_open = None
+            # Running sums that reset at each session (9:30 AM ET trading date) boundary
+            n = len(close)
+            session_start = np.empty(n, dtype=bool)
+            session_start[0] = True
+            session_start[1:] = session_id[1:] != session_id[:-1]
+            start_idx = np.maximum.accumulate(np.where(session_start, np.arange(n), 0))
             
-            for timestamp, row in df_copy.iterrows():
-                # Check if we should include this bar based on extended hours setting
-                if not market_calendar.should_include_in_session(timestamp, include_extended_hours):
-                    # For excluded bars, carry forward the last VWAP value
-                    if len(vwap_values.dropna()) > 0:
-                        vwap_values.loc[timestamp] = vwap_values.dropna().iloc[-1]
-                    else:
-                        vwap_values.loc[timestamp] = row['c']  # Use close price if no VWAP yet
-                    continue
-                
-                # Check for session reset (9:30 AM ET)
-                current_session_open = market_calendar.get_session_open(timestamp)
-                
-                if last_session_open is None or current_session_open != last_session_open:
-                    # New session - reset VWAP calculation
-                    cum_pv = 0
-                    cum_vol = 0
-                    last_session_open = current_session_open
-                    logger.debug(f"VWAP reset at session open: {current_session_open}")
-                
-                # Calculate typical price and accumulate
-                typical_price = (row['h'] + row['l'] + row['c']) / 3
-                pv = typical_price * row['v']
-                
-                cum_pv += pv
-                cum_vol += row['v']
-                
-                # Calculate VWAP
-                if cum_vol > 0:
-                    vwap_values.loc[timestamp] = cum_pv / cum_vol
-                else:
-                    vwap_values.loc[timestamp] = typical_price
+            cum_pv = np.cumsum(pv)
+            cum_vol = np.cumsum(vol)
+            session_pv = cum_pv - (cum_pv - pv)[start_idx]
+            session_vol = cum_vol - (cum_vol - vol)[start_idx]
             
-            # Forward fill any remaining NaN values
-            vwap_values = vwap_values.fillna(method='ffill')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vwap = np.where(session_vol > 0, session_pv / session_vol, typical_price)
             
-            return vwap_values
+            # Excluded bars carry forward the last VWAP (or the first close if there is none yet):
+            # a running max of valid positions gives each bar the index of its last valid VWAP
+            valid = include_mask & ~np.isnan(vwap)
+            last_valid = np.maximum.accumulate(np.where(valid, np.arange(n), -1))
+            return np.where(last_valid >= 0, vwap[last_valid], close[0])
             
         except Exception as e:
             logger.warning(f"Error calculating session-aware VWAP: {e}")
             # Fallback to simple VWAP
-            if 'v' in df.columns and df['v'].sum() > 0:
-                typical_price = (df['h'] + df['l'] + df['c']) / 3
-                pv_cum = (typical_price * df['v']).cumsum()
-                v_cum = df['v'].cumsum()
-                return pv_cum / v_cum.replace(0, np.nan)
+            if volume is not None and volume.sum() > 0:
+                typical_price = (high + low + close) / 3
+                pv_cum = np.cumsum(typical_price * volume)
+                v_cum = np.cumsum(volume)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    return np.where(v_cum != 0, pv_cum / v_cum, np.nan)
             else:
-                return pd.Series(df['c'], index=df.index)  # Fallback to close price
+                return close  # Fallback to close price
     
-    def _calculate_rvol(self, df: pd.DataFrame, lookback_days: int = 20) -> pd.Series:
+    def _calculate_rvol(self, volume: np.ndarray, lookback_days: int = 20) -> np.ndarray:
         """Calculate Relative Volume (current volume vs average volume)."""
-        if df.empty or 'v' not in df.columns:
-            return pd.Series(1.0, index=df.index)
+        if len(volume) == 0:
+            return np.ones(0)
         
         try:
             # Calculate 20-day average volume
-            avg_volume = df['v'].rolling(window=lookback_days * 78, min_periods=10).mean()  # ~78 bars per day (5min)
+            avg_volume = _rolling_mean(volume, lookback_days * 78, min_periods=10)  # ~78 bars per day (5min)
             
             # Calculate relative volume
-            rvol = df['v'] / avg_volume
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rvol = volume / avg_volume
             
             # Handle NaN and infinite values
-            rvol = rvol.fillna(1.0).replace([np.inf, -np.inf], 1.0)
-            
-            return rvol
+            return np.where(np.isfinite(rvol), rvol, 1.0)
             
         except Exception as e:
             logger.warning(f"Error calculating RVOL: {e}")
-            return pd.Series(1.0, index=df.index)
+            return np.ones(len(volume))
+
+# Values copied into a signal's details, in the order process_candles extracts them
+# (the EMA columns are named after the configured periods)
+_SIGNAL_FIELDS = ('c', 'ema_fast', 'ema_slow', 'rsi', 'vwap', 'rvol', 'v')
+
+# Long-signal conditions; each is one bit of the flags from _long_signal_flags
+_LONG_CONDITIONS = ('ema_cross_above', 'rsi_above_min', 'price_above_vwap', 'rvol_above_min')
+_ALL_LONG_CONDITIONS = (1 << len(_LONG_CONDITIONS)) - 1
 
 class SignalProcessor:
     def __init__(self):
         self.indicator_calc = IndicatorCalculator()
         self.signal_config = get_config_value("signals.long_trigger", {})
+        
+        # Indicator column names, resolved once
+        self._col_fast = self.indicator_calc.col_ema_fast
+        self._col_slow = self.indicator_calc.col_ema_slow
+        self._signal_columns = ['c', self._col_fast, self._col_slow, 'rsi', 'vwap', 'rvol', 'v']
+        
+        # Rule settings are read once here rather than on every evaluation
+        self._cfg_ema_cross = self.signal_config.get("ema_cross_above", True)
+        self._cfg_rsi_min = float(self.signal_config.get("rsi_min", 50))
+        self._cfg_price_vwap = self.signal_config.get("price_above_vwap", True)
+        self._cfg_min_rvol = float(self.signal_config.get("min_rvol", 2.0))
     
-    def process_candles(self, symbol: str, tf: str, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def process_candles(self, symbol: str, tf: str, df: pd.DataFrame) -> List[TradingSignal]:
         """Process candles and generate signals."""
         if df.empty:
             return []
         
         # Calculate indicators
         df_with_indicators = self.indicator_calc.calculate_indicators(df)
+        if self._col_fast not in df_with_indicators.columns or self._col_slow not in df_with_indicators.columns:
+            return []
         
-        # Check for signals on the latest few bars
-        signals = []
-        recent_bars = df_with_indicators.tail(5)  # Check last 5 bars for signals
+        # Check for signals on the latest few bars (plus the bar before them for the crossover)
+        recent_bars = df_with_indicators.iloc[-6:]
+        
+        # EMA9 crossing above EMA21 is the rarest condition, so check it first
+        ema_fast = recent_bars[self._col_fast].to_numpy()
+        ema_slow = recent_bars[self._col_slow].to_numpy()
+        cross = np.zeros(len(recent_bars), dtype=bool)
+        cross[1:] = (ema_fast[1:] > ema_slow[1:]) & (ema_fast[:-1] <= ema_slow[:-1])
+        if self._cfg_ema_cross and not cross.any():
+            return []
         
-        for idx, row in recent_bars.iterrows():
-            if pd.isna(row.get('ema_9')) or pd.isna(row.get('ema_21')):
-                continue
-                
-            signal = self._check_long_signal(symbol, tf, idx, row, df_with_indicators)
+        try:
+            flags = self._long_signal_flags(recent_bars, cross)
+        except Exception as e:
+            logger.error(f"Error checking long signal for {symbol}: {e}")
+            return []
+        
+        # Values needed per fired bar, pulled out of the frame in one block
+        tail = recent_bars[self._signal_columns].to_numpy(dtype=np.float64)
+        
+        fire = flags == _ALL_LONG_CONDITIONS
+        fire &= ~np.isnan(tail[:, 1]) & ~np.isnan(tail[:, 2])  # fast and slow EMA
+        fire[0] = False  # Only there as the previous bar (or it is the very first bar)
+        
+        signals = []
+        rows = []
+        for pos in np.flatnonzero(fire):
+            bar_conditions = dict.fromkeys(_LONG_CONDITIONS, True)  # a fired bar met every condition
+            bar = dict(zip(_SIGNAL_FIELDS, tail[pos].tolist()))
+            timestamp = recent_bars.index[pos]
+            signal = self._emit_long_signal(symbol, tf, timestamp, bar, bar_conditions)
             if signal:
                 signals.append(signal)
+                rows.append({
+                    "symbol": symbol,
+                    "tf": tf,
+                    "ts": timestamp,
+                    "rule": signal.rule,
+                    "details": signal.details.to_dict()
+                })
+        
+        # Store all fired signals in one transaction
+        if rows:
+            try:
+                db.add_signals_bulk(rows)
+            except Exception as e:
+                logger.error(f"Error storing {len(rows)} signals for {symbol}: {e}")
         
         return signals
     
-    def _check_long_signal(self, symbol: str, tf: str, timestamp: datetime, 
-                          current_row: pd.Series, df: pd.DataFrame) -> Optional[Dict[str, Any]]:
-        """Check if long signal conditions are met."""
+    def _long_signal_flags(self, bars: pd.DataFrame, cross: np.ndarray) -> np.ndarray:
+        """Evaluate every long-signal condition for all bars at once, one bit per condition
+        (bit order follows _LONG_CONDITIONS); a disabled condition always sets its bit."""
+        close = bars['c'].to_numpy()
+        always = np.ones(len(bars), dtype=bool)
+        
+        # 1. EMA crossover - EMA9 crosses above EMA21 (the first bar has no previous bar)
+        ema_ok = cross if self._cfg_ema_cross else always
+        
+        # 2. RSI > 50
+        rsi_ok = bars['rsi'].to_numpy() > self._cfg_rsi_min
+        
+        # 3. Price above session VWAP
+        if self._cfg_price_vwap:
+            vwap_ok = close >= bars['vwap'].to_numpy()
+        else:
+            vwap_ok = always
+        
+        # 4. Relative Volume >= threshold
+        rvol_ok = bars['rvol'].to_numpy() >= self._cfg_min_rvol
+        
+        return (ema_ok.astype(np.uint8)
+                | (rsi_ok.astype(np.uint8) << 1)
+                | (vwap_ok.astype(np.uint8) << 2)
+                | (rvol_ok.astype(np.uint8) << 3))
+    
+    def _emit_long_signal(self, symbol: str, tf: str, timestamp: datetime,
+                          current_row: Dict[str, float], conditions: Dict[str, bool]) -> Optional[TradingSignal]:
+        """Build a long signal whose conditions are all met; process_candles stores it."""
         try:
-            # Get the current bar index
-            current_idx = df.index.get_loc(timestamp)
-            
-            # Need at least 2 bars for crossover
-            if current_idx < 1:
-                return None
-            
-            prev_row = df.iloc[current_idx - 1]
-            
-            # Signal conditions
-            conditions = {}
-            
-            # 1. EMA crossover - EMA9 crosses above EMA21
-            if self.signal_config.get("ema_cross_above", True):
-                ema9_cross = (current_row['ema_9'] > current_row['ema_21'] and 
-                            prev_row['ema_9'] <= prev_row['ema_21'])
-                conditions['ema_cross_above'] = ema9_cross
-            else:
-                conditions['ema_cross_above'] = True
-            
-            # 2. RSI > 50
-            rsi_min = self.signal_config.get("rsi_min", 50)
-            conditions['rsi_above_min'] = current_row['rsi'] > rsi_min
-            
-            # 3. Price above session VWAP
-            if self.signal_config.get("price_above_vwap", True):
-                conditions['price_above_vwap'] = current_row['c'] >= current_row['vwap']
-            else:
-                conditions['price_above_vwap'] = True
-            
-            # 4. Relative Volume >= threshold
-            min_rvol = self.signal_config.get("min_rvol", 2.0)
-            conditions['rvol_above_min'] = current_row['rvol'] >= min_rvol
+            signal_details = SignalDetails(
+                price=float(current_row['c']),
+                ema_9=float(current_row['ema_fast']),
+                ema_21=float(current_row['ema_slow']),
+                rsi=float(current_row['rsi']),
+                vwap=float(current_row['vwap']),
+                rvol=float(current_row['rvol']),
+                volume=int(current_row['v']),
+                conditions=conditions
+            )
             
-            # Check if all conditions are met
-            all_conditions_met = all(conditions.values())
+            logger.info(f"Long signal fired for {symbol} at {timestamp}: "
+                      f"price={current_row['c']:.2f}, rsi={current_row['rsi']:.1f}, "
+                      f"rvol={current_row['rvol']:.1f}")
             
-            if all_conditions_met:
-                signal_details = {
-                    'price': float(current_row['c']),
-                    'ema_9': float(current_row['ema_9']),
-                    'ema_21': float(current_row['ema_21']),
-                    'rsi': float(current_row['rsi']),
-                    'vwap': float(current_row['vwap']),
-                    'rvol': float(current_row['rvol']),
-                    'volume': int(current_row['v']),
-                    'conditions': conditions
-                }
-                
-                # Store signal in database
-                db.add_signal(
-                    symbol=symbol,
-                    tf=tf,
-                    ts=timestamp,
-                    rule="long_trigger",
-                    details=signal_details
-                )
-                
-                logger.info(f"Long signal fired for {symbol} at {timestamp}: "
-                          f"price={current_row['c']:.2f}, rsi={current_row['rsi']:.1f}, "
-                          f"rvol={current_row['rvol']:.1f}")
-                
-                return {
-                    'symbol': symbol,
-                    'tf': tf,
-                    'timestamp': timestamp.isoformat(),
-                    'rule': 'long_trigger',
-                    'details': signal_details
-                }
+            return TradingSignal(
+                symbol=symbol,
+                tf=tf,
+                timestamp=timestamp.isoformat(),
+                rule='long_trigger',
+                details=signal_details
+            )
             
         except Exception as e:
             logger.error(f"Error checking long signal for {symbol}: {e}")
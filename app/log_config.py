@@ -4,7 +4,10 @@ from loguru import logger
 from datetime import datetime
 
 def setup_logging(log_level: str = "INFO", log_dir: str = "logs"):
-    """Configure structured logging with rotation."""
+    """Configure structured logging with rotation; only the first call installs handlers."""
+    if getattr(setup_logging, "_done", False):
+        return logger
+    setup_logging._done = True
     
     # Remove default handler
     logger.remove()
@@ -45,7 +48,4 @@ def setup_logging(log_level: str = "INFO", log_dir: str = "logs"):
     )
     
     logger.info(f"Logging initialized at level {log_level}")
-    return logger
-
-# Initialize logger
-setup_logging()
\ No newline at end of file
+    return logger
\ No newline at end of file
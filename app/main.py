@@ -1,74 +1,108 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from datetime import datetime, timezone, timedelta
 import asyncio
+import time
+import numpy as np
+import orjson
 import pandas as pd
 from pathlib import Path
+from functools import lru_cache
 
 from app.config import settings, validate_settings_for_streaming
-from app.log_config import logger
+from app.log_config import logger, setup_logging
 from app.data_access import db, storage
 from app.universe import universe_manager
 from app.worker import worker
-from app.indicators import signal_processor
+from app.indicators import signal_processor, aggregate_timeframe
 from app.alerts import alert_manager
 from app.reconciliation import reconciliation_service
 from app.rate_limiter import rate_limiter
 from app.yahoo_provider import yahoo_provider
 
-def aggregate_timeframe(df: pd.DataFrame, tf: str) -> pd.DataFrame:
-    """Aggregate 5m data to higher timeframes."""
-    if df.empty:
-        return df
-    
-    logger.info(f"Aggregating {len(df)} bars to {tf}")
-    logger.info(f"DataFrame columns: {list(df.columns)}")
-    logger.info(f"Index type: {type(df.index)}")
-    
-    # DataFrame already has timestamp as index from storage.read_candles()
-    
-    # Map timeframes to pandas frequency strings
-    tf_map = {
-        '15m': '15T',
-        '30m': '30T', 
-        '1h': '1h',
-        '4h': '4H',
-        '1d': '1D'
-    }
-    
-    if tf not in tf_map:
-        return df.reset_index()
-    
-    freq = tf_map[tf]
-    
-    # Aggregate OHLCV data
-    agg_dict = {
-        'o': 'first',
-        'h': 'max',
-        'l': 'min', 
-        'c': 'last',
-        'v': 'sum'
-    }
-    
-    # Add any indicator columns that exist
-    for col in df.columns:
-        if col not in agg_dict:
-            if col.startswith(('ema_', 'sma_', 'rsi', 'bb_', 'vwap', 'atr')):
-                agg_dict[col] = 'last'  # Use last value for indicators
-            elif col in ['rvol']:
-                agg_dict[col] = 'mean'  # Average for volume-based indicators
+setup_logging()
+
+# Indicator columns included in candle responses when present
+CANDLE_INDICATOR_COLUMNS = ['ema_9', 'ema_21', 'rsi', 'bb_upper', 'bb_middle', 'bb_lower', 'vwap', 'atr', 'rvol']
+
+def candles_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a ts-indexed candle frame to chart records; NaN indicator values are omitted."""
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize('UTC')
     
-    # Resample and aggregate
-    df_agg = df.resample(freq).agg(agg_dict).dropna()
+    candles = pd.DataFrame({
+        "time": index.asi8 // 1_000_000_000,
+        "open": df['o'].to_numpy(dtype=np.float64),
+        "high": df['h'].to_numpy(dtype=np.float64),
+        "low": df['l'].to_numpy(dtype=np.float64),
+        "close": df['c'].to_numpy(dtype=np.float64),
+        "volume": df['v'].to_numpy(dtype=np.int64)
+    }).to_dict(orient='records')
     
-    # Reset index to get timestamp back as column
-    df_agg = df_agg.reset_index()
+    # Indicators are sparse at the start of the series, so only valid cells are added
+    for col in CANDLE_INDICATOR_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy(dtype=np.float64)
+        as_floats = values.tolist()
+        for i in np.flatnonzero(~np.isnan(values)).tolist():
+            candles[i][col] = as_floats[i]
     
-    return df_agg
+    return candles
+
+# Candle responses larger than this are streamed in chunks instead of built whole (and are not cached)
+CANDLE_STREAM_THRESHOLD = 5000
+CANDLE_STREAM_CHUNK = 1000
+
+def stream_candles_json(symbol: str, tf: str, df: pd.DataFrame) -> Iterator[bytes]:
+    """Yield the /api/candles JSON body, converting and serialising one chunk of rows at a time."""
+    yield b'{"symbol":' + orjson.dumps(symbol) + b',"tf":' + orjson.dumps(tf) + b',"candles":['
+    for start in range(0, len(df), CANDLE_STREAM_CHUNK):
+        chunk = orjson.dumps(candles_to_records(df.iloc[start:start + CANDLE_STREAM_CHUNK]))
+        yield (b',' if start else b'') + chunk[1:-1]
+    yield b'],"count":' + str(len(df)).encode() + b'}'
+
+@lru_cache(maxsize=1024)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO timestamp query param; polled chart ranges repeat the same strings."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+# Short-lived cache of /api/candles responses, so chart polling does not redo the
+# read + resample + indicator work; open-ended requests also expire at each new 5m bar
+CANDLE_CACHE_TTL = 30.0
+CANDLE_CACHE_MAXSIZE = 512
+_candle_cache: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}
+
+def _candle_cache_key(symbol: str, tf: str, from_time: Optional[str],
+                      to_time: Optional[str], limit: Optional[int]) -> Tuple:
+    """Cache key for a candles request."""
+    current_bar = int(time.time()) // 300 if to_time is None else None
+    return (symbol, tf, from_time, to_time, limit, current_bar)
+
+def _candle_cache_get(key: Tuple) -> Optional[Dict[str, Any]]:
+    """Return a cached candles response if it has not expired."""
+    entry = _candle_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def _candle_cache_put(key: Tuple, response: Dict[str, Any]):
+    """Cache a candles response, evicting the oldest entry when full."""
+    _candle_cache.pop(key, None)
+    while len(_candle_cache) >= CANDLE_CACHE_MAXSIZE:
+        _candle_cache.pop(next(iter(_candle_cache)))
+    _candle_cache[key] = (time.monotonic() + CANDLE_CACHE_TTL, response)
+
+# Health payload is reused for this long, so frequent liveness probes don't
+# each query the worker, universe, rate limiter, reconciliation, DB and storage
+HEALTH_CACHE_TTL = 1.0
+_health_cache: Dict[str, Any] = {'ts': 0.0, 'payload': None}
+_HEALTH_HEADERS = {"Cache-Control": "max-age=1"}
 
 # Pydantic models for request/response
 class SettingsRequest(BaseModel):
@@ -100,11 +134,18 @@ class SignalRules(BaseModel):
     price_above_vwap: Optional[bool] = True
     min_rvol: Optional[float] = 2.0
 
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
 # Create FastAPI app
 app = FastAPI(
     title="Trading App API",
     description="Real-time trading data and signal processing",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=OrjsonResponse
 )
 
 # CORS middleware
@@ -116,23 +157,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ImmutableStaticFiles(StaticFiles):
+    """Static files with content-hashed names, cacheable by browsers and proxies for good."""
+    
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+# index.html must always be revalidated so a new build's asset hashes are picked up
+_INDEX_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate, max-age=0",
+    "Pragma": "no-cache",
+    "Expires": "0"
+}
+
 # Serve static files (built React app)
 static_dir = Path("static")
+_index_html: Optional[bytes] = None
 if static_dir.exists():
     # Mount the static directory to serve assets
-    app.mount("/assets", StaticFiles(directory="static/assets"), name="assets")
+    app.mount("/assets", ImmutableStaticFiles(directory="static/assets"), name="assets")
     app.mount("/static", StaticFiles(directory="static"), name="static")
+    
+    # The built index never changes at runtime, so keep it in memory
+    static_index = static_dir / "index.html"
+    if static_index.exists():
+        _index_html = static_index.read_bytes()
 
 @app.get("/")
 async def serve_app():
     """Serve the React application."""
-    static_index = Path("static/index.html")
-    if static_index.exists():
-        return FileResponse(static_index, headers={
-            "Cache-Control": "no-cache, no-store, must-revalidate, max-age=0",
-            "Pragma": "no-cache",
-            "Expires": "0"
-        })
+    if _index_html is not None:
+        return Response(_index_html, media_type="text/html", headers=_INDEX_HEADERS)
     else:
         return HTMLResponse("""
         <html>
@@ -151,18 +208,13 @@ async def serve_app():
 @app.get("/charts")
 async def serve_charts():
     """Serve the new charts interface with cache-busting."""
-    static_index = Path("static/index.html")
-    if static_index.exists():
-        return FileResponse(static_index, headers={
-            "Cache-Control": "no-cache, no-store, must-revalidate, max-age=0",
-            "Pragma": "no-cache", 
-            "Expires": "0"
-        })
+    if _index_html is not None:
+        return Response(_index_html, media_type="text/html", headers=_INDEX_HEADERS)
     else:
         return HTMLResponse("Charts interface not built yet.")
 
 @app.get("/api/settings")
-async def get_settings():
+def get_settings():
     """Get current settings."""
     try:
         settings_dict = db.get_all_settings()
@@ -194,7 +246,7 @@ async def get_settings():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/settings")
-async def update_settings(request: SettingsRequest):
+def update_settings(request: SettingsRequest):
     """Update application settings."""
     try:
         updated_keys = []
@@ -294,7 +346,7 @@ async def start_worker(background_tasks: BackgroundTasks):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/control/stop")
-async def stop_worker(background_tasks: BackgroundTasks):
+def stop_worker(background_tasks: BackgroundTasks):
     """Stop the trading worker."""
     try:
         result = worker.stop()
@@ -385,27 +437,31 @@ async def get_candles(
     limit: Optional[int] = 1000
 ):
     """Get candle data for a symbol and timeframe."""
+    cache_key = _candle_cache_key(symbol, tf, from_time, to_time, limit)
+    cached = _candle_cache_get(cache_key)
+    if cached is not None:
+        return OrjsonResponse(cached)
+    
     try:
         # Parse time parameters
         start_time = None
         end_time = None
         
         if from_time:
-            start_time = datetime.fromisoformat(from_time.replace('Z', '+00:00'))
+            start_time = _parse_iso(from_time)
         
         if to_time:
-            end_time = datetime.fromisoformat(to_time.replace('Z', '+00:00'))
+            end_time = _parse_iso(to_time)
         
-        # Read candles from storage - always get 5m data first
+        # Read candles from storage - always get 5m data first; parquet I/O and the
+        # pandas work below run in the threadpool so they don't block the event loop
         base_tf = "5m"
-        df = storage.read_candles(symbol, base_tf, start_time, end_time)
+        df = await asyncio.to_thread(storage.read_candles, symbol, base_tf, start_time, end_time)
         
-        logger.info(f"Read {len(df)} candles for {symbol} from storage")
-        if not df.empty:
-            logger.info(f"DataFrame index type: {type(df.index)}")
-            logger.info(f"DataFrame columns: {list(df.columns)}")
-            logger.info(f"Index name: {df.index.name}")
-            logger.info(f"First few timestamps: {df.index[:3].tolist()}")
+        logger.opt(lazy=True).debug(
+            "Read {} candles for {} from storage (first timestamps: {})",
+            lambda: len(df), lambda: symbol, lambda: df.index[:3].tolist()
+        )
         
         if df.empty:
             return {
@@ -426,53 +482,41 @@ async def get_candles(
             if df.index.tz is None:
                 df.index = pd.to_datetime(df.index, utc=True)
             df.index.name = 'ts'
-            df = aggregate_timeframe(df, tf)
+            df = await asyncio.to_thread(aggregate_timeframe, df, tf)
             # After aggregation, set index back to ts
             if 'ts' in df.columns:
                 df['ts'] = pd.to_datetime(df['ts'], utc=True)
                 df = df.set_index('ts').sort_index()
         
         # Calculate indicators on DataFrame with timestamp index
-        df_with_indicators = signal_processor.indicator_calc.calculate_indicators(df)
-        
-        # Prepare response: ensure ts as column for iteration
-        df_resp = df_with_indicators.reset_index()
+        df_with_indicators = await asyncio.to_thread(signal_processor.indicator_calc.calculate_indicators, df)
         
         # Apply limit (take most recent N)
-        if limit and len(df_resp) > limit:
-            df_resp = df_resp.tail(limit)
-        
-        candles: List[Dict[str, Any]] = []
-        for _, row in df_resp.iterrows():
-            candle = {
-                "time": int(pd.to_datetime(row['ts']).timestamp()),
-                "open": float(row['o']),
-                "high": float(row['h']),
-                "low": float(row['l']),
-                "close": float(row['c']),
-                "volume": int(row['v'])
-            }
-            
-            # Add indicators if they exist
-            for col in ['ema_9', 'ema_21', 'rsi', 'bb_upper', 'bb_middle', 'bb_lower', 'vwap', 'atr', 'rvol']:
-                if col in row and not pd.isna(row[col]):
-                    candle[col] = float(row[col])
-            
-            candles.append(candle)
+        if limit and len(df_with_indicators) > limit:
+            df_with_indicators = df_with_indicators.tail(limit)
         
-        return {
+        if len(df_with_indicators) > CANDLE_STREAM_THRESHOLD:
+            return StreamingResponse(stream_candles_json(symbol, tf, df_with_indicators),
+                                     media_type="application/json")
+        
+        candles = candles_to_records(df_with_indicators)
+        
+        response = {
             "symbol": symbol,
             "tf": tf,
             "candles": candles,
             "count": len(candles)
         }
+        _candle_cache_put(cache_key, response)
+        # Returned as a response so the records skip FastAPI's jsonable_encoder walk
+        return OrjsonResponse(response)
         
     except Exception as e:
         logger.error(f"Error getting candles for {symbol}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/signals")
-async def get_signals(
+def get_signals(
     symbol: Optional[str] = None,
     tf: Optional[str] = None,
     limit: Optional[int] = 100
@@ -481,27 +525,21 @@ async def get_signals(
     try:
         signals = db.get_signals(symbol=symbol, tf=tf, limit=limit)
         
-        return {
+        return OrjsonResponse({
             "signals": signals,
             "count": len(signals)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error getting signals: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/signals/{signal_id}/alert")
-async def resend_signal_alert(signal_id: int, background_tasks: BackgroundTasks):
+def resend_signal_alert(signal_id: int, background_tasks: BackgroundTasks):
     """Resend alert for a specific signal."""
     try:
         # Get signal from database
-        signals = db.get_signals(limit=1000)  # Get all recent signals
-        signal = None
-        
-        for s in signals:
-            if s['id'] == signal_id:
-                signal = s
-                break
+        signal = db.get_signal_by_id(signal_id)
         
         if not signal:
             raise HTTPException(status_code=404, detail="Signal not found")
@@ -521,7 +559,7 @@ async def resend_signal_alert(signal_id: int, background_tasks: BackgroundTasks)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/rules")
-async def get_rules():
+def get_rules():
     """Get current signal rules (from DB or defaults)."""
     try:
         raw_rules = db.get_setting("SIGNAL_RULES_JSON")
@@ -542,7 +580,7 @@ async def get_rules():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/rules")
-async def update_rules(rules: SignalRules):
+def update_rules(rules: SignalRules):
     """Update signal rules (stored in DB settings)."""
     try:
         import json
@@ -554,8 +592,12 @@ async def update_rules(rules: SignalRules):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/healthz")
-async def health_check():
+def health_check():
     """Enhanced health check endpoint with comprehensive metrics."""
+    now = time.monotonic()
+    if _health_cache['payload'] is not None and now - _health_cache['ts'] < HEALTH_CACHE_TTL:
+        return OrjsonResponse(_health_cache['payload'], headers=_HEALTH_HEADERS)
+    
     try:
         worker_status = worker.get_status()
         universe_info = universe_manager.get_cache_info()
@@ -564,7 +606,7 @@ async def health_check():
         
         # Check database connectivity
         try:
-            db.get_setting("health_check", "ok")
+            db.get_setting("health_check", "ok", use_cache=False)
             db_status = "healthy"
         except Exception as e:
             db_status = f"error: {e}"
@@ -579,7 +621,7 @@ async def health_check():
         # Extended hours setting
         include_extended_hours = db.get_setting('INCLUDE_EXTENDED_HOURS', 'false').lower() == 'true'
         
-        return {
+        payload = {
             "status": "healthy" if worker_status['running'] else "stopped",
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "worker": worker_status,
@@ -603,6 +645,10 @@ async def health_check():
             "reconciliation": reconciliation_stats
         }
         
+        _health_cache['ts'] = now
+        _health_cache['payload'] = payload
+        return OrjsonResponse(payload, headers=_HEALTH_HEADERS)
+        
     except Exception as e:
         logger.error(f"Health check error: {e}")
         return {
@@ -612,27 +658,21 @@ async def health_check():
         }
 
 @app.get("/api/stats")
-async def get_stats():
+def get_stats():
     """Get application statistics."""
     try:
         worker_status = worker.get_status()
         symbols_with_data = storage.get_symbols_with_data()
         
-        # Get signal counts
-        recent_signals = db.get_signals(limit=1000)
-        signal_counts = {}
-        for signal in recent_signals:
-            symbol = signal['symbol']
-            if symbol not in signal_counts:
-                signal_counts[symbol] = 0
-            signal_counts[symbol] += 1
+        # Get signal counts over the last 1000 signals, grouped in SQLite
+        signal_counts = db.get_signal_counts_by_symbol(limit=1000)
         
         return {
             "worker": worker_status,
             "data_symbols_count": len(symbols_with_data),
             "data_symbols": symbols_with_data[:20],  # First 20 symbols
-            "recent_signals_count": len(recent_signals),
-            "signals_by_symbol": dict(sorted(signal_counts.items(), key=lambda x: x[1], reverse=True)[:10])
+            "recent_signals_count": sum(signal_counts.values()),
+            "signals_by_symbol": dict(list(signal_counts.items())[:10])
         }
         
     except Exception as e:
@@ -657,6 +697,18 @@ async def startup_event():
         logger.error(f"Application startup failed: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Application shutdown tasks."""
+    try:
+        await alert_manager.aclose()
+        await reconciliation_service.aclose()
+        rate_limiter.flush_daily_count()
+        logger.info("Application shutdown completed")
+
+    except Exception as e:
+        logger.error(f"Application shutdown failed: {e}")
+
 @app.post("/api/reconciliation/run")
 async def run_reconciliation():
     """Manually trigger reconciliation for the previous session."""
@@ -2,9 +2,13 @@
 US market calendar utilities for session-aware processing.
 Handles regular trading hours, extended hours, and VWAP session resets.
 """
-from datetime import datetime, timezone, time as dt_time, timedelta
+import calendar
+from datetime import date, datetime, timezone, time as dt_time, timedelta
+from functools import lru_cache
 from typing import Tuple, Optional
-import pytz
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
 
 
 class USMarketCalendar:
@@ -14,7 +18,7 @@ class USMarketCalendar:
     """
     
     def __init__(self):
-        self.eastern_tz = pytz.timezone('America/New_York')
+        self.eastern_tz = ZoneInfo('America/New_York')
         
         # NYSE/NASDAQ Market Holidays (2024-2026)
         # Updated annually from: https://www.nyse.com/markets/hours-calendars
@@ -56,6 +60,29 @@ class USMarketCalendar:
             '2026-12-25': "Christmas Day"
         }
         
+        # Early close days (1:00 PM ET close)
+        self.early_close_days = {
+            '2024-11-29': "Day after Thanksgiving",  # Friday after Thanksgiving 2024
+            '2024-12-24': "Christmas Eve",
+            '2025-11-28': "Day after Thanksgiving",  # Friday after Thanksgiving 2025
+            '2025-12-24': "Christmas Eve",
+            '2026-11-27': "Day after Thanksgiving",  # Friday after Thanksgiving 2026
+            '2026-12-24': "Christmas Eve"
+        }
+        
+        # Date ordinals for O(1) membership tests without formatting date strings
+        self._holiday_ords = frozenset(date.fromisoformat(d).toordinal() for d in self.market_holidays)
+        self._early_close_ords = frozenset(date.fromisoformat(d).toordinal() for d in self.early_close_days)
+        
+        # Holidays as days since the epoch, matching get_session_arrays' session ids
+        self._holiday_days = pd.to_datetime(list(self.market_holidays)).asi8 // 86_400_000_000_000
+        
+        # Non-trading days per (year, month): bit d-1 is set when day d is a weekend or holiday
+        self._nontrading_bits = {}
+        for year in {date.fromisoformat(d).year for d in self.market_holidays}:
+            for month in range(1, 13):
+                self._month_mask(year, month)
+        
         # Regular trading session times (ET)
         self.regular_open = dt_time(9, 30)  # 9:30 AM ET
         self.regular_close = dt_time(16, 0)  # 4:00 PM ET
@@ -64,47 +91,67 @@ class USMarketCalendar:
         self.premarket_open = dt_time(4, 0)   # 4:00 AM ET
         self.postmarket_close = dt_time(20, 0)  # 8:00 PM ET
         
+        # The same session boundaries as minutes since ET midnight, for integer comparisons
+        self._regular_open_mod = 9 * 60 + 30
+        self._regular_close_mod = 16 * 60
+        self._premarket_open_mod = 4 * 60
+        self._postmarket_close_mod = 20 * 60
+        
     def is_market_day(self, dt: datetime) -> bool:
         """
         Check if given date is a trading day (Mon-Fri, excluding holidays).
         Accounts for all NYSE/NASDAQ market holidays.
         """
         # Convert to ET for consistency
-        et_dt = dt.astimezone(self.eastern_tz)
-        
-        # Check if it's a weekend
-        if et_dt.weekday() >= 5:  # Saturday = 5, Sunday = 6
-            return False
-            
-        # Check if it's a market holiday
-        date_str = et_dt.strftime('%Y-%m-%d')
-        if date_str in self.market_holidays:
-            return False
-            
-        return True
+        return self._is_trading_date(self._et_date_minute(dt)[0])
+    
+    def _et_date_minute(self, dt: datetime) -> Tuple[date, int]:
+        """ET trading date and minute of the ET day for a timestamp."""
+        return self._et_date_minute_at(int(dt.timestamp()))
+    
+    @lru_cache(maxsize=8192)
+    def _et_date_minute_at(self, epoch_s: int) -> Tuple[date, int]:
+        """ET date and minute of day for a UTC epoch second; cached so repeated bars skip the tz conversion."""
+        et_dt = datetime.fromtimestamp(epoch_s, tz=self.eastern_tz)
+        return et_dt.date(), et_dt.hour * 60 + et_dt.minute
+    
+    def _is_trading_date(self, et_date: date) -> bool:
+        """Check an ET date against the weekend/holiday bitmask for its month."""
+        # One bit test covers both weekends and holidays
+        mask = self._nontrading_bits.get((et_date.year, et_date.month))
+        if mask is None:
+            mask = self._month_mask(et_date.year, et_date.month)
+        return not (mask >> (et_date.day - 1)) & 1
+    
+    def _month_mask(self, year: int, month: int) -> int:
+        """Build and store the non-trading day bitmask for one month."""
+        first_weekday, days = calendar.monthrange(year, month)
+        first_ord = date(year, month, 1).toordinal()
+        mask = 0
+        for day in range(days):
+            if (first_weekday + day) % 7 >= 5 or first_ord + day in self._holiday_ords:
+                mask |= 1 << day
+        self._nontrading_bits[(year, month)] = mask
+        return mask
         
     def is_regular_hours(self, dt: datetime) -> bool:
         """Check if given datetime falls within regular trading hours."""
-        if not self.is_market_day(dt):
+        et_date, minute = self._et_date_minute(dt)
+        if not self._is_trading_date(et_date):
             return False
-            
-        et_dt = dt.astimezone(self.eastern_tz)
-        current_time = et_dt.time()
         
-        return self.regular_open <= current_time < self.regular_close
+        return self._regular_open_mod <= minute < self._regular_close_mod
         
     def is_extended_hours(self, dt: datetime) -> bool:
         """Check if given datetime falls within extended trading hours."""
-        if not self.is_market_day(dt):
+        et_date, minute = self._et_date_minute(dt)
+        if not self._is_trading_date(et_date):
             return False
-            
-        et_dt = dt.astimezone(self.eastern_tz)
-        current_time = et_dt.time()
         
         # Pre-market: 4:00 AM - 9:30 AM ET
         # Post-market: 4:00 PM - 8:00 PM ET
-        return ((self.premarket_open <= current_time < self.regular_open) or
-                (self.regular_close <= current_time < self.postmarket_close))
+        return ((self._premarket_open_mod <= minute < self._regular_open_mod) or
+                (self._regular_close_mod <= minute < self._postmarket_close_mod))
         
     def should_include_in_session(self, dt: datetime, include_extended_hours: bool) -> bool:
         """
@@ -121,17 +168,45 @@ class USMarketCalendar:
         Get the session open time for a given datetime.
         Returns 9:30 AM ET for the trading day.
         """
-        et_dt = dt.astimezone(self.eastern_tz)
-        session_date = et_dt.date()
-        
-        # Create session open datetime (9:30 AM ET)
-        session_open_et = self.eastern_tz.localize(
-            datetime.combine(session_date, self.regular_open)
-        )
+        return self._session_open_for_date(self._et_date_minute(dt)[0])
         
-        # Convert back to UTC
+    @lru_cache(maxsize=1024)
+    def _session_open_for_date(self, session_date: date) -> datetime:
+        """Session open (9:30 AM ET) in UTC for an ET trading date; cached per date."""
+        session_open_et = datetime.combine(session_date, self.regular_open, tzinfo=self.eastern_tz)
         return session_open_et.astimezone(timezone.utc)
         
+    def get_session_arrays(self, index: pd.DatetimeIndex,
+                           include_extended_hours: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorised session lookup for a whole index of bar timestamps.
+        Returns (session_id, include_mask): session_id is the ET trading date as a
+        day number (same grouping as get_session_open) and include_mask matches
+        should_include_in_session for every bar.
+        """
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        
+        et_local = index.tz_convert(self.eastern_tz).tz_localize(None)
+        local_ns = et_local.asi8
+        session_id = local_ns // 86_400_000_000_000
+        minute_of_day = (local_ns // 60_000_000_000) % 1440
+        
+        is_market_day = (et_local.dayofweek.to_numpy() < 5) & ~np.isin(session_id, self._holiday_days)
+        
+        if include_extended_hours:
+            start, end = self._premarket_open_mod, self._postmarket_close_mod
+        else:
+            start, end = self._regular_open_mod, self._regular_close_mod
+        include_mask = is_market_day & (minute_of_day >= start) & (minute_of_day < end)
+        
+        return session_id, include_mask
+        
+    def regular_hours_mask(self, timestamps) -> np.ndarray:
+        """Vectorised is_regular_hours for a Series or index of timestamps."""
+        _, include_mask = self.get_session_arrays(pd.DatetimeIndex(timestamps), include_extended_hours=False)
+        return include_mask
+        
     def is_new_session(self, current_dt: datetime, last_dt: Optional[datetime] = None) -> bool:
         """
         Check if we've crossed into a new trading session (past 9:30 AM ET).
@@ -140,10 +215,8 @@ class USMarketCalendar:
         if last_dt is None:
             return True
             
-        current_session_open = self.get_session_open(current_dt)
-        last_session_open = self.get_session_open(last_dt)
-        
-        return current_session_open != last_session_open
+        # Sessions are keyed by ET trading date, so comparing the dates is enough
+        return self._et_date_minute(current_dt)[0] != self._et_date_minute(last_dt)[0]
         
     def align_to_5min_boundary(self, dt: datetime) -> datetime:
         """
@@ -159,29 +232,32 @@ class USMarketCalendar:
         # Convert back to UTC
         return aligned_et.astimezone(timezone.utc)
         
+    def align_to_5min_boundary_vec(self, index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+        """
+        Vectorised align_to_5min_boundary for a whole index, returned in UTC.
+        ET is a whole-hour offset from UTC, so 5-minute ET boundaries are UTC boundaries.
+        """
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        return index.tz_convert('UTC').floor('5min')
+        
     def get_trading_session_bounds(self, dt: datetime, include_extended_hours: bool) -> Tuple[datetime, datetime]:
         """
         Get the start and end bounds for a trading session.
         """
-        et_dt = dt.astimezone(self.eastern_tz)
-        session_date = et_dt.date()
-        
+        return self._session_bounds_for_date(self._et_date_minute(dt)[0], include_extended_hours)
+    
+    @lru_cache(maxsize=512)
+    def _session_bounds_for_date(self, session_date: date, include_extended_hours: bool) -> Tuple[datetime, datetime]:
+        """Session bounds in UTC for an ET trading date; cached per date."""
         if include_extended_hours:
             # Extended session: 4:00 AM - 8:00 PM ET
-            session_start_et = self.eastern_tz.localize(
-                datetime.combine(session_date, self.premarket_open)
-            )
-            session_end_et = self.eastern_tz.localize(
-                datetime.combine(session_date, self.postmarket_close)
-            )
+            session_start_et = datetime.combine(session_date, self.premarket_open, tzinfo=self.eastern_tz)
+            session_end_et = datetime.combine(session_date, self.postmarket_close, tzinfo=self.eastern_tz)
         else:
             # Regular session: 9:30 AM - 4:00 PM ET
-            session_start_et = self.eastern_tz.localize(
-                datetime.combine(session_date, self.regular_open)
-            )
-            session_end_et = self.eastern_tz.localize(
-                datetime.combine(session_date, self.regular_close)
-            )
+            session_start_et = datetime.combine(session_date, self.regular_open, tzinfo=self.eastern_tz)
+            session_end_et = datetime.combine(session_date, self.regular_close, tzinfo=self.eastern_tz)
             
         return (
             session_start_et.astimezone(timezone.utc),
@@ -190,62 +266,53 @@ class USMarketCalendar:
     
     def get_next_trading_day(self, dt: datetime) -> datetime:
         """Get the next trading day after the given date."""
-        next_day = dt + timedelta(days=1)
-        
-        # Keep looking until we find a trading day
-        while not self.is_market_day(next_day):
-            next_day += timedelta(days=1)
-            
-        return next_day
+        return self._step_to_trading_day(dt, 1)
     
     def get_previous_trading_day(self, dt: datetime) -> datetime:
         """Get the previous trading day before the given date."""
-        prev_day = dt - timedelta(days=1)
+        return self._step_to_trading_day(dt, -1)
+    
+    def _step_to_trading_day(self, dt: datetime, step: int) -> datetime:
+        """Move dt by whole days (step=1 forward, -1 back) until it lands on a trading day."""
+        # Walk in ET date space: each candidate is a bitmask test, with no tz conversion
+        et_date = self._et_date_minute(dt)[0]
+        target = et_date + timedelta(days=step)
+        while not self._is_trading_date(target):
+            target += timedelta(days=step)
         
-        # Keep looking until we find a trading day
-        while not self.is_market_day(prev_day):
-            prev_day -= timedelta(days=1)
-            
-        return prev_day
+        result = dt + (target - et_date)
+        if self._et_date_minute(result)[0] == target:
+            return result
+        
+        # Within an hour of ET midnight across a DST change, whole days shift the ET date
+        result = dt + timedelta(days=step)
+        while not self.is_market_day(result):
+            result += timedelta(days=step)
+        return result
     
     def is_early_close_day(self, dt: datetime) -> bool:
         """
         Check if market closes early (1:00 PM ET) on this day.
         Typically day after Thanksgiving, Christmas Eve, etc.
         """
-        et_dt = dt.astimezone(self.eastern_tz)
-        date_str = et_dt.strftime('%Y-%m-%d')
-        
-        # Early close days (1:00 PM ET close)
-        early_close_days = {
-            '2024-11-29': "Day after Thanksgiving",  # Friday after Thanksgiving 2024
-            '2024-12-24': "Christmas Eve",
-            '2025-11-28': "Day after Thanksgiving",  # Friday after Thanksgiving 2025
-            '2025-12-24': "Christmas Eve",
-            '2026-11-27': "Day after Thanksgiving",  # Friday after Thanksgiving 2026
-            '2026-12-24': "Christmas Eve"
-        }
-        
-        return date_str in early_close_days
+        return self._et_date_minute(dt)[0].toordinal() in self._early_close_ords
     
     def get_market_close_time(self, dt: datetime) -> datetime:
         """
         Get the market close time for a given date.
         Returns 4:00 PM ET normally, 1:00 PM ET on early close days.
         """
-        et_dt = dt.astimezone(self.eastern_tz)
-        session_date = et_dt.date()
-        
-        if self.is_early_close_day(dt):
+        return self._market_close_for_date(self._et_date_minute(dt)[0])
+    
+    @lru_cache(maxsize=512)
+    def _market_close_for_date(self, session_date: date) -> datetime:
+        """Market close in UTC for an ET trading date; cached per date."""
+        if session_date.toordinal() in self._early_close_ords:
             # Early close at 1:00 PM ET
-            close_time_et = self.eastern_tz.localize(
-                datetime.combine(session_date, dt_time(13, 0))
-            )
+            close_time_et = datetime.combine(session_date, dt_time(13, 0), tzinfo=self.eastern_tz)
         else:
             # Normal close at 4:00 PM ET
-            close_time_et = self.eastern_tz.localize(
-                datetime.combine(session_date, self.regular_close)
-            )
+            close_time_et = datetime.combine(session_date, self.regular_close, tzinfo=self.eastern_tz)
             
         return close_time_et.astimezone(timezone.utc)
 
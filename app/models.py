@@ -0,0 +1,58 @@
+"""
+Lightweight in-memory models passed between signal generation and alerting.
+"""
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any
+
+
+@dataclass(slots=True)
+class SignalDetails:
+    """Indicator snapshot at the bar a signal fired on."""
+    price: float
+    ema_9: float
+    ema_21: float
+    rsi: float
+    vwap: float
+    rvol: float
+    volume: int
+    conditions: Dict[str, bool] = field(default_factory=dict)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SignalDetails":
+        return cls(
+            price=data['price'],
+            ema_9=data['ema_9'],
+            ema_21=data['ema_21'],
+            rsi=data['rsi'],
+            vwap=data['vwap'],
+            rvol=data['rvol'],
+            volume=data['volume'],
+            conditions=data.get('conditions', {})
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class TradingSignal:
+    """A fired trading signal, as produced by the signal processor."""
+    symbol: str
+    tf: str
+    timestamp: str
+    rule: str
+    details: SignalDetails
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TradingSignal":
+        """Build from a signal dict; db rows carry 'ts' rather than 'timestamp'."""
+        return cls(
+            symbol=data['symbol'],
+            tf=data.get('tf', ''),
+            timestamp=data.get('timestamp') or data.get('ts'),
+            rule=data.get('rule', 'long_trigger'),
+            details=SignalDetails.from_dict(data['details'])
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
@@ -5,8 +5,9 @@ Ensures we stay within 500 REST calls/day and 60 calls/minute limits.
 import asyncio
 import time
 import random
+from collections import deque
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any
+from typing import Deque, Dict, Any, Optional
 from dataclasses import dataclass
 from loguru import logger
 
@@ -27,14 +28,32 @@ class RateLimiter:
     """
     Rate limiter that enforces:
     - 500 API calls per day (resets at UTC midnight)
-    - 60 API calls per minute
+    - 60 API calls per any sliding 60-second window
     """
     
     def __init__(self, daily_limit: int = 500, minute_limit: int = 60):
         self.daily_limit = daily_limit
         self.minute_limit = minute_limit
-        self.calls_this_minute = 0
-        self.minute_window_start = time.time()
+        self.last_call_time = 0.0
+        
+        # Monotonic timestamps of the calls made in the last 60 seconds
+        self._recent_calls: Deque[float] = deque()
+        
+        # Set from a 429's Retry-After: no calls until this monotonic time
+        self._blocked_until = 0.0
+        
+        # Cap on Finnhub requests in flight at once, across all callers
+        self.max_concurrent_requests = 16
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+        
+        # Guards the check-then-record step so concurrent acquirers can't overshoot a limit
+        self._acquire_lock: Optional[asyncio.Lock] = None
+        
+        # The persisted daily count is written every few calls or seconds, not per call
+        self.save_every_calls = 10
+        self.save_interval = 5.0
+        self._unsaved_calls = 0
+        self._last_save = time.monotonic()
         
         # Load today's call count from persistent storage
         self._load_daily_count()
@@ -58,18 +77,33 @@ class RateLimiter:
         today_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
         db.set_setting('rate_limiter_date', today_str)
         db.set_setting('rate_limiter_count', str(self.calls_today))
+        self._unsaved_calls = 0
+        self._last_save = time.monotonic()
+        
+    def flush_daily_count(self):
+        """Persist the daily call count if calls were recorded since the last save."""
+        if self._unsaved_calls:
+            self._save_daily_count()
         
-    def _reset_minute_window_if_needed(self):
-        """Reset minute window if 60 seconds have passed."""
-        now = time.time()
-        if now - self.minute_window_start >= 60:
-            self.calls_this_minute = 0
-            self.minute_window_start = now
+    def _prune_minute_window(self):
+        """Drop calls that have left the 60-second window."""
+        cutoff = time.monotonic() - 60
+        recent_calls = self._recent_calls
+        while recent_calls and recent_calls[0] <= cutoff:
+            recent_calls.popleft()
             
+    @property
+    def calls_this_minute(self) -> int:
+        """Calls made in the last 60 seconds."""
+        self._prune_minute_window()
+        return len(self._recent_calls)
+        
     def can_make_call(self) -> bool:
         """Check if we can make an API call without exceeding limits."""
-        self._reset_minute_window_if_needed()
-        
+        # Back off while the server has told us to
+        if time.monotonic() < self._blocked_until:
+            return False
+            
         # Check daily limit
         if self.calls_today >= self.daily_limit:
             return False
@@ -82,8 +116,6 @@ class RateLimiter:
         
     def get_delay_until_next_call(self) -> float:
         """Get seconds to wait before next call is allowed."""
-        self._reset_minute_window_if_needed()
-        
         # If we can make a call now, return 0
         if self.can_make_call():
             return 0
@@ -95,18 +127,37 @@ class RateLimiter:
             ) + timedelta(days=1)
             return (tomorrow - datetime.now(timezone.utc)).total_seconds()
             
-        # If we've hit minute limit, wait until next minute window
+        delay = max(0.0, self._blocked_until - time.monotonic())
+        
+        # If we've hit minute limit, wait until the oldest call leaves the window
         if self.calls_this_minute >= self.minute_limit:
-            return 60 - (time.time() - self.minute_window_start)
+            delay = max(delay, 60 - (time.monotonic() - self._recent_calls[0]))
             
-        return 0
+        return delay
         
     def record_call(self):
         """Record that an API call was made."""
-        self._reset_minute_window_if_needed()
+        self._prune_minute_window()
+        self._recent_calls.append(time.monotonic())
+        self.last_call_time = time.time()
         self.calls_today += 1
-        self.calls_this_minute += 1
-        self._save_daily_count()
+        self._unsaved_calls += 1
+        if (self._unsaved_calls >= self.save_every_calls or
+                time.monotonic() - self._last_save >= self.save_interval):
+            self._save_daily_count()
+        
+    def penalize(self, retry_after: float):
+        """Hold off all callers for retry_after seconds after the server returned 429."""
+        blocked_until = time.monotonic() + retry_after
+        if blocked_until > self._blocked_until:
+            self._blocked_until = blocked_until
+        logger.warning(f"Finnhub returned 429, pausing API calls for {retry_after:.1f} seconds")
+        
+    def request_slot(self) -> asyncio.Semaphore:
+        """Semaphore to hold while a Finnhub request is in flight."""
+        if self._request_semaphore is None:
+            self._request_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        return self._request_semaphore
         
     async def wait_for_availability(self):
         """Wait until we can make an API call."""
@@ -123,9 +174,13 @@ class RateLimiter:
         for attempt in range(max_retries):
             await self.wait_for_availability()
             
-            if self.can_make_call():
-                self.record_call()
-                return
+            # Waiting happens outside the lock so waiters don't queue behind each other's sleeps
+            if self._acquire_lock is None:
+                self._acquire_lock = asyncio.Lock()
+            async with self._acquire_lock:
+                if self.can_make_call():
+                    self.record_call()
+                    return
                 
             # Exponential backoff with jitter for fairness
             backoff_delay = (2 ** attempt) + random.uniform(0, 1)
@@ -137,7 +192,7 @@ class RateLimiter:
         
     def get_stats(self) -> RateLimitStats:
         """Get current rate limiting statistics."""
-        self._reset_minute_window_if_needed()
+        self.flush_daily_count()
         
         # Calculate next daily reset time
         tomorrow = datetime.now(timezone.utc).replace(
@@ -148,7 +203,7 @@ class RateLimiter:
             calls_today=self.calls_today,
             calls_this_minute=self.calls_this_minute,
             budget_remaining_today=max(0, self.daily_limit - self.calls_today),
-            last_call_time=time.time(),
+            last_call_time=self.last_call_time,
             daily_reset_time=tomorrow
         )
 
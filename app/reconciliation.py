@@ -3,11 +3,16 @@ End-of-day reconciliation system.
 Aligns live-built candles with official adjusted REST data after market close.
 """
 import asyncio
+import shutil
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
 from typing import List, Dict, Any, Optional
+import numpy as np
 import pandas as pd
 import httpx
+import orjson
 from loguru import logger
+from sqlalchemy import distinct, func
 
 from app.config import get_config_value
 from app.data_access import storage, db
@@ -23,13 +28,38 @@ class ReconciliationService:
     def __init__(self):
         self.api_key = None
         
+        # Symbols reconciled at once; Finnhub calls are also capped by rate_limiter.request_slot()
+        self.max_concurrent_symbols = 8
+        
+        # Shared client so Finnhub connections stay warm across reconciliation runs
+        self.http_timeout = 60.0
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Fetched official sessions are kept on disk so a retried run doesn't refetch them
+        self.cache_dir = storage.data_dir / "cache" / "recon"
+        self.cache_retention_days = 30
+        
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.http_timeout,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=16)
+            )
+        return self._client
+        
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        
     def set_api_key(self, api_key: str):
         """Set the Finnhub API key for reconciliation."""
         self.api_key = api_key
     
     def _refresh_api_key(self):
-        """Refresh API key from database settings."""
-        from app.data_access import db
+        """Refresh API key from database settings (served from the settings cache)."""
         self.api_key = db.get_setting("FINNHUB_API_KEY")
         
     async def reconcile_previous_session(self, symbols: List[str]) -> Dict[str, int]:
@@ -49,8 +79,10 @@ class ReconciliationService:
             logger.error("API key not set for reconciliation")
             return {}
             
+        include_extended_hours = db.get_setting('INCLUDE_EXTENDED_HOURS', 'false').lower() == 'true'
+        
         # Determine previous trading session
-        session_date, session_start, session_end = self._get_previous_session_bounds()
+        session_date, session_start, session_end = self._get_previous_session_bounds(include_extended_hours)
         
         if not session_date:
             logger.info("No previous session to reconcile")
@@ -64,50 +96,97 @@ class ReconciliationService:
             
         logger.info(f"Starting reconciliation for session {session_date} ({len(symbols)} symbols)")
         
-        results = {}
-        include_extended_hours = db.get_setting('INCLUDE_EXTENDED_HOURS', 'false').lower() == 'true'
+        # Symbols are reconciled concurrently; the rate limiter still paces the Finnhub calls
+        semaphore = asyncio.Semaphore(self.max_concurrent_symbols)
+        
+        async def reconcile_bounded(client: httpx.AsyncClient, symbol: str) -> Optional[int]:
+            async with semaphore:
+                return await self._reconcile_symbol(
+                    client, symbol, session_date, session_start, session_end, include_extended_hours
+                )
+        
+        client = self._get_client()
+        outcomes = await asyncio.gather(*(reconcile_bounded(client, symbol) for symbol in symbols))
+        
+        results = {
+            symbol: bars_updated
+            for symbol, bars_updated in zip(symbols, outcomes)
+            if bars_updated is not None
+        }
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            for symbol in symbols:
-                try:
-                    # Check if we have data for this session
-                    live_data = storage.get_session_data(
-                        symbol, "5m", session_start, session_end
-                    )
-                    
-                    if live_data.empty:
-                        logger.debug(f"No live data to reconcile for {symbol} on {session_date}")
-                        continue
-                        
-                    # Fetch official data for the session
-                    official_data = await self._fetch_official_session_data(
-                        client, symbol, session_start, session_end, include_extended_hours
-                    )
-                    
-                    if official_data.empty:
-                        logger.debug(f"No official data available for {symbol} on {session_date}")
-                        continue
-                        
-                    # Reconcile the data
-                    bars_updated = storage.reconcile_session_data(
-                        symbol, "5m", official_data, session_date
-                    )
-                    
-                    results[symbol] = bars_updated
-                    
-                    if bars_updated > 0:
-                        logger.info(f"Reconciled {bars_updated} bars for {symbol} on {session_date}")
-                    
-                except Exception as e:
-                    logger.error(f"Error reconciling {symbol} for {session_date}: {e}")
-                    results[symbol] = 0
-                    
         total_updated = sum(results.values())
         logger.info(f"Reconciliation completed: {total_updated} total bars updated across {len(results)} symbols")
         
         return results
         
-    def _get_previous_session_bounds(self) -> tuple[Optional[str], Optional[datetime], Optional[datetime]]:
+    async def _reconcile_symbol(self, client: httpx.AsyncClient, symbol: str, session_date: str,
+                                session_start: datetime, session_end: datetime,
+                                include_extended_hours: bool) -> Optional[int]:
+        """Reconcile one symbol; returns bars updated, or None if there was nothing to compare."""
+        try:
+            # Parquet reads and writes run in threads so concurrent symbols don't stall the event loop
+            live_data = await asyncio.to_thread(
+                storage.get_session_data, symbol, "5m", session_start, session_end
+            )
+            
+            if live_data.empty:
+                logger.debug(f"No live data to reconcile for {symbol} on {session_date}")
+                return None
+                
+            # Fetch official data for the session, unless an earlier run already did
+            cache_path = self._official_cache_path(symbol, session_date, include_extended_hours)
+            if cache_path.exists():
+                official_data = await asyncio.to_thread(pd.read_parquet, cache_path)
+            else:
+                official_data = await self._fetch_official_session_data(
+                    client, symbol, session_start, session_end, include_extended_hours
+                )
+                if not official_data.empty:
+                    await asyncio.to_thread(self._write_official_cache, cache_path, official_data)
+            
+            if official_data.empty:
+                logger.debug(f"No official data available for {symbol} on {session_date}")
+                return None
+                
+            # Reconcile the data
+            bars_updated = await asyncio.to_thread(
+                storage.reconcile_session_data, symbol, "5m", official_data, session_date
+            )
+            
+            if bars_updated > 0:
+                logger.info(f"Reconciled {bars_updated} bars for {symbol} on {session_date}")
+            
+            return bars_updated
+            
+        except Exception as e:
+            logger.error(f"Error reconciling {symbol} for {session_date}: {e}")
+            return 0
+        
+    def _official_cache_path(self, symbol: str, session_date: str, include_extended_hours: bool) -> Path:
+        """Cache file for one symbol's official session bars."""
+        suffix = "_ext" if include_extended_hours else ""
+        return self.cache_dir / session_date / f"{symbol}{suffix}.parquet"
+        
+    def _write_official_cache(self, cache_path: Path, official_data: pd.DataFrame):
+        """Store fetched official bars; a failed write only costs a refetch later."""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            official_data.to_parquet(cache_path, compression='zstd', index=False)
+        except Exception as e:
+            logger.warning(f"Could not cache official data at {cache_path}: {e}")
+            
+    def _prune_official_cache(self):
+        """Remove cached sessions older than the retention window."""
+        if not self.cache_dir.exists():
+            return
+        
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.cache_retention_days)).strftime('%Y-%m-%d')
+        for session_dir in self.cache_dir.iterdir():
+            # Session directories are named YYYY-MM-DD, so string order is date order
+            if session_dir.is_dir() and session_dir.name < cutoff:
+                shutil.rmtree(session_dir, ignore_errors=True)
+        
+    def _get_previous_session_bounds(self, include_extended_hours: bool) -> tuple[Optional[str], Optional[datetime], Optional[datetime]]:
         """Get the bounds for the previous trading session."""
         try:
             now = datetime.now(timezone.utc)
@@ -118,10 +197,6 @@ class ReconciliationService:
                 
                 if market_calendar.is_market_day(candidate_date):
                     # Found the last trading day
-                    include_extended_hours = db.get_setting(
-                        'INCLUDE_EXTENDED_HOURS', 'false'
-                    ).lower() == 'true'
-                    
                     session_start, session_end = market_calendar.get_trading_session_bounds(
                         candidate_date, include_extended_hours
                     )
@@ -137,79 +212,95 @@ class ReconciliationService:
             
     async def _fetch_official_session_data(self, client: httpx.AsyncClient, symbol: str,
                                           session_start: datetime, session_end: datetime,
-                                          include_extended_hours: bool) -> pd.DataFrame:
-        """Fetch official adjusted data for a trading session."""
+                                          include_extended_hours: bool,
+                                          resolution: str = '5') -> pd.DataFrame:
+        """
+        Fetch official adjusted 5-minute bars for a trading session.
+        resolution='1' fetches 1-minute bars and aggregates them locally instead.
+        """
         try:
-            # Acquire rate limit permission
-            await rate_limiter.acquire_with_backoff()
-            
-            # Request 1-minute data for accuracy
             url = "https://finnhub.io/api/v1/stock/candle"
             params = {
                 'symbol': symbol,
-                'resolution': '1',
+                'resolution': resolution,
                 'from': int(session_start.timestamp()),
                 'to': int(session_end.timestamp()),
                 'token': self.api_key,
                 'adjusted': 'true'  # Critical: ensure adjustments for splits/dividends
             }
             
-            response = await client.get(url, params=params)
-            
-            if response.status_code == 429:
-                # Rate limit - wait and retry once
-                await asyncio.sleep(5)
-                response = await client.get(url, params=params)
+            for attempt in range(2):
+                # Acquire rate limit permission
+                await rate_limiter.acquire_with_backoff()
+                
+                async with rate_limiter.request_slot():
+                    response = await client.get(url, params=params)
+                
+                if response.status_code != 429:
+                    break
+                
+                # Rate limited: pause the shared limiter so other symbols back off too, then retry once
+                rate_limiter.penalize(self._retry_after_seconds(response))
                 
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if data.get('s') != 'ok':
                 logger.debug(f"No official data for {symbol}: {data}")
                 return pd.DataFrame()
                 
-            # Convert to DataFrame
+            # Convert to DataFrame indexed by bar time, straight from the response arrays;
+            # prices use the stored float32 width, and the frame adopts the arrays without copying
+            index = pd.to_datetime(np.asarray(data['t'], dtype=np.int64), unit='s', utc=True)
+            index.name = 'ts'
             df = pd.DataFrame({
-                'ts': pd.to_datetime(data['t'], unit='s', utc=True),
-                'o': data['o'],
-                'h': data['h'],
-                'l': data['l'],
-                'c': data['c'],
-                'v': data['v']
-            })
+                'o': np.asarray(data['o'], dtype=np.float32),
+                'h': np.asarray(data['h'], dtype=np.float32),
+                'l': np.asarray(data['l'], dtype=np.float32),
+                'c': np.asarray(data['c'], dtype=np.float32),
+                'v': np.asarray(data['v'], dtype=np.int64)
+            }, index=index, copy=False)
             
             if df.empty:
                 return df
                 
             # Filter for session hours
             if not include_extended_hours:
-                df = df[df['ts'].apply(lambda x: market_calendar.is_regular_hours(x))]
+                df = df[market_calendar.regular_hours_mask(df.index)]
                 
             if df.empty:
                 return df
                 
-            # Resample 1-minute to 5-minute bars with proper alignment
-            df = df.set_index('ts')
-            df_et = df.tz_convert('America/New_York')
+            # 5-minute bars come back already aligned
+            if resolution == '5':
+                return df.reset_index()
+                
+            # Aggregate 1-minute to 5-minute bars on ET 5-minute boundaries
+            buckets = market_calendar.align_to_5min_boundary_vec(df.index)
             
-            df_5m_et = df_et.resample('5T', origin='start').agg({
+            df_5m = df.groupby(buckets).agg({
                 'o': 'first',
                 'h': 'max',
                 'l': 'min',
                 'c': 'last',
                 'v': 'sum'
             }).dropna()
+            df_5m.index.name = 'ts'
             
-            # Convert back to UTC
-            df_5m = df_5m_et.tz_convert('UTC')
-            df_5m = df_5m.reset_index()
-            
-            return df_5m
+            return df_5m.reset_index()
             
         except Exception as e:
             logger.error(f"Error fetching official data for {symbol}: {e}")
             return pd.DataFrame()
             
+    @staticmethod
+    def _retry_after_seconds(response: httpx.Response, default: float = 5.0) -> float:
+        """Seconds to wait from a 429's Retry-After header, falling back to a default."""
+        try:
+            return max(0.0, float(response.headers.get('Retry-After', default)))
+        except ValueError:
+            return default
+            
     async def run_reconciliation_check(self, symbols: List[str]) -> bool:
         """Run reconciliation check and return True if reconciliation was performed."""
         try:
@@ -227,6 +318,7 @@ class ReconciliationService:
             if not should_reconcile:
                 return False
                 
+            await asyncio.to_thread(self._prune_official_cache)
             results = await self.reconcile_previous_session(symbols)
             return len(results) > 0
             
@@ -243,17 +335,19 @@ class ReconciliationService:
             with db.get_session() as session:
                 from app.data_access import Reconciliation
                 
+                # Counted and summed in one SQL scan rather than loading every row
                 week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-                recent_reconciliations = session.query(Reconciliation).filter(
+                reconciliation_count, total_bars_updated, unique_symbols = session.query(
+                    func.count(Reconciliation.id),
+                    func.coalesce(func.sum(Reconciliation.bars_updated), 0),
+                    func.count(distinct(Reconciliation.symbol))
+                ).filter(
                     Reconciliation.reconciled_at >= week_ago
-                ).all()
-                
-                total_bars_updated = sum(r.bars_updated for r in recent_reconciliations)
-                unique_symbols = len(set(r.symbol for r in recent_reconciliations))
+                ).one()
                 
             return {
                 'last_reconcile_date': last_reconcile_date,
-                'reconciliations_last_7_days': len(recent_reconciliations),
+                'reconciliations_last_7_days': reconciliation_count,
                 'bars_updated_last_7_days': total_bars_updated,
                 'symbols_reconciled_last_7_days': unique_symbols
             }
@@ -1,5 +1,9 @@
+import asyncio
 import httpx
-import json
+import os
+import re
+import time
+import orjson
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional
 from loguru import logger
@@ -7,6 +11,24 @@ from pathlib import Path
 
 from app.config import settings, get_config_value
 from app.data_access import db
+from app.rate_limiter import rate_limiter
+
+# Ticker symbols: letters/digits with optional share-class separators, e.g. BRK.B, BF-B
+_SYMBOL_RE = re.compile(r'[A-Za-z0-9][A-Za-z0-9.\-]{0,9}')
+
+# Top 50 S&P 500 stocks, used when neither the API nor the cache yields a universe (respects free plan limit)
+_FALLBACK_UNIVERSE = (
+    # Top 10 by market cap
+    'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'TSLA', 'META', 'BRK.B', 'UNH', 'JNJ',
+    
+    # Next 20 largest
+    'XOM', 'JPM', 'V', 'WMT', 'PG', 'HD', 'CVX', 'MA', 'BAC', 'ABBV',
+    'PFE', 'AVGO', 'KO', 'LLY', 'COST', 'PEP', 'MRK', 'TMO', 'DIS', 'ABT',
+    
+    # Tech & Growth (top 20)
+    'NFLX', 'ADBE', 'CRM', 'ORCL', 'ACN', 'CSCO', 'TXN', 'QCOM', 'INTC', 'AMD',
+    'IBM', 'NOW', 'UBER', 'PYPL', 'SHOP', 'SNOW', 'ZM', 'DOCU', 'OKTA', 'TWLO'
+)
 
 class UniverseManager:
     def __init__(self):
@@ -14,6 +36,10 @@ class UniverseManager:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.cache_file = self.cache_dir / "universe.json"
         self.cache_hours = get_config_value("defaults.universe_cache_hours", 12)
+        
+        # A positive validity check is trusted for this long before stat()ing the file again
+        self.validity_ttl = 60.0
+        self._cache_valid_until = 0.0
     
     async def get_universe_symbols(self, force_refresh: bool = False) -> List[str]:
         """Get the current universe symbols, using cache if valid."""
@@ -21,14 +47,14 @@ class UniverseManager:
         # Check if we have a valid cache
         if not force_refresh and self._is_cache_valid():
             logger.debug("Using cached universe data")
-            return self._load_cached_universe()
+            return await self._load_cached_universe()
         
         # Fetch fresh data from Finnhub
         logger.info("Fetching fresh universe data from Finnhub")
         try:
             symbols = await self._fetch_universe_from_api()
             if symbols:  # Only cache if we got valid symbols
-                self._cache_universe(symbols)
+                await self._cache_universe(symbols)
             return symbols
         except Exception as e:
             logger.error(f"Failed to fetch universe: {e}")
@@ -36,54 +62,44 @@ class UniverseManager:
             # Fall back to cache if API fails
             if self.cache_file.exists():
                 logger.warning("API failed, falling back to cached data")
-                cached_symbols = self._load_cached_universe()
+                cached_symbols = await self._load_cached_universe()
                 if cached_symbols:
                     return cached_symbols
             
             # If no cache, return fallback symbols (Top 50 S&P 500 stocks - respects free plan limit)
             logger.warning("No cached data available, using top 50 fallback symbols")
-            fallback_symbols = [
-                # Top 10 by market cap
-                'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'TSLA', 'META', 'BRK.B', 'UNH', 'JNJ',
-                
-                # Next 20 largest
-                'XOM', 'JPM', 'V', 'WMT', 'PG', 'HD', 'CVX', 'MA', 'BAC', 'ABBV',
-                'PFE', 'AVGO', 'KO', 'LLY', 'COST', 'PEP', 'MRK', 'TMO', 'DIS', 'ABT',
-                
-                # Tech & Growth (top 20)
-                'NFLX', 'ADBE', 'CRM', 'ORCL', 'ACN', 'CSCO', 'TXN', 'QCOM', 'INTC', 'AMD',
-                'IBM', 'NOW', 'UBER', 'PYPL', 'SHOP', 'SNOW', 'ZM', 'DOCU', 'OKTA', 'TWLO'
-            ]
-            logger.info(f"Using {len(fallback_symbols)} fallback symbols for testing")
-            return fallback_symbols
+            logger.info(f"Using {len(_FALLBACK_UNIVERSE)} fallback symbols for testing")
+            return list(_FALLBACK_UNIVERSE)
     
     def _is_cache_valid(self) -> bool:
         """Check if the cached universe data is still valid."""
-        if not self.cache_file.exists():
-            return False
+        if time.monotonic() < self._cache_valid_until:
+            return True
         
         try:
-            cache_time = datetime.fromtimestamp(
-                self.cache_file.stat().st_mtime, 
-                tz=timezone.utc
-            )
-            expiry_time = cache_time + timedelta(hours=self.cache_hours)
-            return datetime.now(timezone.utc) < expiry_time
+            remaining = os.path.getmtime(self.cache_file) + self.cache_hours * 3600 - time.time()
+        except FileNotFoundError:
+            return False
         except Exception as e:
             logger.error(f"Error checking cache validity: {e}")
             return False
+        
+        if remaining <= 0:
+            return False
+        
+        self._cache_valid_until = time.monotonic() + min(self.validity_ttl, remaining)
+        return True
     
-    def _load_cached_universe(self) -> List[str]:
+    async def _load_cached_universe(self) -> List[str]:
         """Load universe symbols from cache file."""
         try:
-            with open(self.cache_file, 'r') as f:
-                data = json.load(f)
-                return data.get('symbols', [])
+            data = orjson.loads(await asyncio.to_thread(self.cache_file.read_bytes))
+            return data.get('symbols', [])
         except Exception as e:
             logger.error(f"Error loading cached universe: {e}")
             return []
     
-    def _cache_universe(self, symbols: List[str]):
+    async def _cache_universe(self, symbols: List[str]):
         """Cache universe symbols to file."""
         try:
             cache_data = {
@@ -92,9 +108,9 @@ class UniverseManager:
                 'source': get_config_value("defaults.universe_symbol", "^NDX")
             }
             
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
-                
+            await asyncio.to_thread(self.cache_file.write_bytes, orjson.dumps(cache_data))
+            self._cache_valid_until = 0.0
+            
             logger.info(f"Cached {len(symbols)} universe symbols")
             
         except Exception as e:
@@ -118,10 +134,11 @@ class UniverseManager:
         }
         
         async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, params=params)
+            async with rate_limiter.request_slot():
+                response = await client.get(url, params=params)
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Handle different response formats
             if isinstance(data, dict):
@@ -132,32 +149,19 @@ class UniverseManager:
             if not constituents:
                 logger.warning(f"No constituents found for {universe_symbol}")
                 # Return comprehensive fallback symbols for testing (Top 50 - respects free plan limit)
-                fallback_symbols = [
-                    # Top 10 by market cap
-                    'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'TSLA', 'META', 'BRK.B', 'UNH', 'JNJ',
-                    
-                    # Next 20 largest
-                    'XOM', 'JPM', 'V', 'WMT', 'PG', 'HD', 'CVX', 'MA', 'BAC', 'ABBV',
-                    'PFE', 'AVGO', 'KO', 'LLY', 'COST', 'PEP', 'MRK', 'TMO', 'DIS', 'ABT',
-                    
-                    # Tech & Growth (top 20)
-                    'NFLX', 'ADBE', 'CRM', 'ORCL', 'ACN', 'CSCO', 'TXN', 'QCOM', 'INTC', 'AMD',
-                    'IBM', 'NOW', 'UBER', 'PYPL', 'SHOP', 'SNOW', 'ZM', 'DOCU', 'OKTA', 'TWLO'
-                ]
-                logger.warning(f"Using fallback symbols ({len(fallback_symbols)} stocks): {fallback_symbols[:5]}...")
-                return fallback_symbols
+                logger.warning(f"Using fallback symbols ({len(_FALLBACK_UNIVERSE)} stocks): {list(_FALLBACK_UNIVERSE[:5])}...")
+                return list(_FALLBACK_UNIVERSE)
             
             # Filter out any invalid symbols
-            valid_symbols = []
-            for symbol in constituents:
-                if isinstance(symbol, str) and len(symbol) > 0 and symbol.replace('.', '').replace('-', '').isalnum():
-                    valid_symbols.append(symbol)
+            valid_symbols = [
+                symbol for symbol in constituents
+                if isinstance(symbol, str) and _SYMBOL_RE.fullmatch(symbol)
+            ]
             
             logger.info(f"Fetched {len(valid_symbols)} valid symbols from {universe_symbol}")
             
             # Update securities in database
-            for symbol in valid_symbols:
-                db.update_security(symbol)
+            db.update_securities(valid_symbols)
             
             return valid_symbols
     
@@ -175,8 +179,7 @@ class UniverseManager:
             }
         
         try:
-            with open(self.cache_file, 'r') as f:
-                data = json.load(f)
+            data = orjson.loads(self.cache_file.read_bytes())
             
             cache_time = datetime.fromtimestamp(
                 self.cache_file.stat().st_mtime, 
@@ -7,6 +7,7 @@ import random
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Callable, Any
 from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import httpx
 from loguru import logger
@@ -118,23 +119,19 @@ class CandleAggregator:
     
     def flush_completed_candles(self):
         """Write all completed candles to storage and clear the buffer."""
-        try:
-            for symbol, candles in self.completed_candles.items():
-                if candles:
-                    # Convert to DataFrame
-                    df = pd.DataFrame(candles)
-                    
-                    # Write to storage
-                    tf = f"{self.timeframe_minutes}m"
-                    storage.write_candles(symbol, tf, df)
-                    
-                    logger.debug(f"Flushed {len(candles)} candles for {symbol}")
-            
-            # Clear completed candles
-            self.completed_candles.clear()
+        tf = f"{self.timeframe_minutes}m"
+        
+        # Each symbol is written and cleared on its own so one bad batch can't stall the rest
+        for symbol in list(self.completed_candles):
+            candles = self.completed_candles.pop(symbol)
+            if not candles:
+                continue
             
-        except Exception as e:
-            logger.error(f"Error flushing completed candles: {e}")
+            try:
+                storage.write_candles(symbol, tf, pd.DataFrame(candles))
+                logger.debug(f"Flushed {len(candles)} candles for {symbol}")
+            except Exception as e:
+                logger.error(f"Error flushing {len(candles)} completed candles for {symbol}: {e}")
     
     def force_complete_current_candles(self):
         """Force complete all current candles (useful for shutdown)."""
@@ -157,6 +154,11 @@ class FinnhubWorker:
         self.aggregator = CandleAggregator(timeframe_minutes=5)
         self.aggregator.add_candle_callback(self._on_candle_completed)
         
+        # Signal processing for completed candles runs off the WebSocket thread on a small
+        # fixed pool; the work is mostly GIL-bound pandas, so more threads only add contention
+        self.signal_workers = get_config_value("defaults.signal_workers", 4)
+        self.signal_executor = self._new_signal_executor()
+        
         # Current universe symbols
         self.universe_symbols: List[str] = []
         
@@ -194,6 +196,10 @@ class FinnhubWorker:
         signal.signal(signal.SIGTERM, self._signal_handler)
         signal.signal(signal.SIGINT, self._signal_handler)
     
+    def _new_signal_executor(self) -> ThreadPoolExecutor:
+        """Create the thread pool that runs signal processing for completed candles."""
+        return ThreadPoolExecutor(max_workers=self.signal_workers, thread_name_prefix="signals")
+    
     async def start(self) -> Dict[str, str]:
         """Start the worker - backfill data and begin live streaming."""
         if self.is_running:
@@ -203,6 +209,10 @@ class FinnhubWorker:
             logger.info("Starting Finnhub worker...")
             self.is_running = True
             
+            # stop() shuts the signal pool down; a restart needs a fresh one
+            if self.signal_executor is None:
+                self.signal_executor = self._new_signal_executor()
+            
             # Refresh API key from latest settings
             self._refresh_api_key()
             logger.info("API key refreshed from settings")
@@ -255,6 +265,11 @@ class FinnhubWorker:
         self.aggregator.force_complete_current_candles()
         self.aggregator.flush_completed_candles()
         
+        # Drop queued signal jobs and wait for running ones so nothing runs against a stopped worker
+        if self.signal_executor is not None:
+            self.signal_executor.shutdown(wait=True, cancel_futures=True)
+            self.signal_executor = None
+        
         return {'status': 'success', 'message': 'Worker stopped'}
     
     async def _backfill_data(self):
@@ -329,7 +344,7 @@ class FinnhubWorker:
             # Filter for extended hours if needed
             if not include_extended_hours:
                 # Filter to regular market hours only
-                df = df[df['ts'].apply(lambda x: market_calendar.is_regular_hours(x))]
+                df = df[market_calendar.regular_hours_mask(df['ts'])]
             
             if df.empty:
                 logger.debug(f"No market hours data for {symbol}")
@@ -384,7 +399,7 @@ class FinnhubWorker:
             # Filter for extended hours if needed
             if not include_extended_hours:
                 # Filter to regular market hours only
-                df = df[df['ts'].apply(lambda x: market_calendar.is_regular_hours(x))]
+                df = df[market_calendar.regular_hours_mask(df['ts'])]
             
             if df.empty:
                 logger.debug(f"No market hours data for {symbol}")
@@ -548,6 +563,17 @@ class FinnhubWorker:
     
     def _on_candle_completed(self, symbol: str, candle: Dict):
         """Callback when a 5-minute candle is completed."""
+        executor = self.signal_executor
+        if executor is None:
+            return
+        
+        try:
+            executor.submit(self._process_completed_candle, symbol)
+        except Exception as e:
+            logger.error(f"Error scheduling signal processing for {symbol}: {e}")
+    
+    def _process_completed_candle(self, symbol: str):
+        """Run indicators and signal checks for a symbol whose candle just completed."""
         try:
             # Process indicators and signals
             df = storage.read_candles(symbol, "5m")
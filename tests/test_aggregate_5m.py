@@ -1,5 +1,6 @@
 import pytest
 from datetime import datetime, timezone
+from unittest.mock import patch
 from app.worker import CandleAggregator
 
 class TestCandleAggregator:
@@ -159,4 +160,27 @@ class TestCandleAggregator:
         assert completed_candle['v'] == 150
         
         # Current candles should be cleared
-        assert len(self.aggregator.current_candles) == 0
\ No newline at end of file
+        assert len(self.aggregator.current_candles) == 0
+    
+    def test_flush_failure_is_isolated_per_symbol(self):
+        """Test that a symbol whose write fails doesn't block or re-append the others."""
+        timestamp_ms = 1640995200000
+        for symbol in ["AAPL", "MSFT", "NVDA"]:
+            self.aggregator.process_trade(symbol, 150.00, 100, timestamp_ms)
+        self.aggregator.force_complete_current_candles()
+        
+        written = []
+        
+        def write_candles(symbol, tf, df):
+            if symbol == "AAPL":
+                raise ValueError("bad batch")
+            written.append(symbol)
+        
+        with patch('app.worker.storage.write_candles', side_effect=write_candles):
+            self.aggregator.flush_completed_candles()
+            assert sorted(written) == ["MSFT", "NVDA"]
+            assert len(self.aggregator.completed_candles) == 0
+            
+            # Nothing left over to be written again on the next flush
+            self.aggregator.flush_completed_candles()
+            assert sorted(written) == ["MSFT", "NVDA"]
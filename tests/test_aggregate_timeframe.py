@@ -0,0 +1,97 @@
+import pytest
+import pandas as pd
+import numpy as np
+
+from app.indicators import aggregate_timeframe
+
+RESAMPLE_FREQ = {
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1h',
+    '4h': '4h',
+    '1d': '1D'
+}
+
+
+def resample_reference(df: pd.DataFrame, tf: str) -> pd.DataFrame:
+    """The original pandas implementation: resample, aggregate, drop incomplete buckets."""
+    agg_dict = {'o': 'first', 'h': 'max', 'l': 'min', 'c': 'last', 'v': 'sum'}
+    for col in df.columns:
+        if col not in agg_dict:
+            if col.startswith(('ema_', 'sma_', 'rsi', 'bb_', 'vwap', 'atr')):
+                agg_dict[col] = 'last'
+            elif col in ['rvol']:
+                agg_dict[col] = 'mean'
+    
+    return df.resample(RESAMPLE_FREQ[tf]).agg(agg_dict).dropna().reset_index()
+
+
+def make_gappy_candles(seed: int = 7) -> pd.DataFrame:
+    """Three days of 5m bars with overnight gaps, missing bars and leading NaN indicators."""
+    rng = np.random.default_rng(seed)
+    
+    sessions = [
+        pd.date_range(f"2024-01-{day} 14:30", f"2024-01-{day} 20:55", freq="5min", tz="UTC")
+        for day in (8, 9, 10)
+    ]
+    index = sessions[0].append(sessions[1:])
+    index = index.delete(rng.choice(len(index), size=20, replace=False))
+    index.name = 'ts'
+    
+    n = len(index)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    df = pd.DataFrame({
+        'o': (close + rng.normal(0, 0.1, n)).astype('float32'),
+        'h': (close + 0.5).astype('float32'),
+        'l': (close - 0.5).astype('float32'),
+        'c': close.astype('float32'),
+        'v': rng.integers(1_000, 4_000_000_000, n).astype('uint32'),
+        'ema_9': close,
+        'rsi': rng.uniform(0, 100, n),
+        'vwap': close,
+        'rvol': rng.uniform(0.5, 3.0, n)
+    }, index=index)
+    
+    # Indicators are undefined until their warm-up period has passed
+    df.iloc[:8, df.columns.get_loc('ema_9')] = np.nan
+    df.iloc[:14, df.columns.get_loc('rsi')] = np.nan
+    df.iloc[:3, df.columns.get_loc('rvol')] = np.nan
+    return df
+
+
+class TestAggregateTimeframe:
+    """Test higher-timeframe aggregation against pandas resample."""
+    
+    @pytest.mark.parametrize("tf", ['15m', '30m', '1h', '4h', '1d'])
+    def test_matches_resample(self, tf):
+        """Test that aggregation matches resample().agg().dropna() on gappy data."""
+        df = make_gappy_candles()
+        
+        result = aggregate_timeframe(df, tf)
+        expected = resample_reference(df, tf)
+        
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    
+    def test_volume_sum_does_not_wrap(self):
+        """Test that uint32 volumes summed past 2**32 are exact."""
+        df = make_gappy_candles()
+        
+        result = aggregate_timeframe(df, '1d')
+        
+        assert (result['v'] > np.iinfo(np.uint32).max).all()
+        expected = df['v'].astype('int64').groupby(df.index.floor('1D')).sum()
+        np.testing.assert_array_equal(result['v'].to_numpy(), expected.to_numpy())
+    
+    def test_unsorted_input_matches_sorted(self):
+        """Test that out-of-order bars aggregate the same as sorted ones."""
+        df = make_gappy_candles()
+        shuffled = df.sample(frac=1.0, random_state=3)
+        
+        pd.testing.assert_frame_equal(aggregate_timeframe(shuffled, '1h'), aggregate_timeframe(df, '1h'))
+    
+    def test_unknown_timeframe_and_empty_frame(self):
+        """Test that unknown timeframes pass through and empty frames are returned as-is."""
+        df = make_gappy_candles()
+        
+        pd.testing.assert_frame_equal(aggregate_timeframe(df, '5m'), df.reset_index())
+        assert aggregate_timeframe(df.iloc[:0], '1h').empty
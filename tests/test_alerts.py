@@ -0,0 +1,119 @@
+import pytest
+import asyncio
+import orjson
+from unittest.mock import AsyncMock, MagicMock
+
+from app.alerts import AlertManager
+
+
+def make_signal(symbol: str) -> dict:
+    """Create a sample signal payload."""
+    return {
+        'symbol': symbol,
+        'tf': '5m',
+        'timestamp': '2024-01-08T14:30:00+00:00',
+        'rule': 'long_trigger',
+        'details': {
+            'price': 150.25,
+            'ema_9': 150.1,
+            'ema_21': 149.8,
+            'rsi': 61.2,
+            'vwap': 149.9,
+            'rvol': 2.4,
+            'volume': 120000
+        }
+    }
+
+
+class TestAlertBatching:
+    """Test batching of signal alerts."""
+
+    def setup_method(self):
+        """Set up an alert manager with both channels configured."""
+        self.alert_manager = AlertManager()
+        self.alert_manager.update_settings(
+            discord_webhook="https://discord.test/webhook",
+            telegram_bot_token="token",
+            telegram_chat_id="chat"
+        )
+        self.alert_manager.max_wait_ms = 50
+
+        response = MagicMock()
+        response.raise_for_status = MagicMock()
+        self.client = MagicMock()
+        self.client.is_closed = False
+        self.client.post = AsyncMock(return_value=response)
+        self.client.aclose = AsyncMock()
+        self.alert_manager._client = self.client
+
+    @pytest.mark.asyncio
+    async def test_signals_coalesced_into_one_request_per_channel(self):
+        """Test that signals queued together go out as one Discord and one Telegram post."""
+        for symbol in ['AAPL', 'MSFT', 'NVDA']:
+            await self.alert_manager.send_signal_alert(make_signal(symbol))
+
+        await asyncio.sleep(0.2)
+
+        assert self.client.post.await_count == 2
+
+        discord_call = next(c for c in self.client.post.await_args_list
+                            if c.args[0] == "https://discord.test/webhook")
+        assert len(orjson.loads(discord_call.kwargs['content'])['embeds']) == 3
+
+        await self.alert_manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_batch_size_is_capped(self):
+        """Test that a batch never exceeds max_batch signals."""
+        self.alert_manager.update_settings(telegram_bot_token="")
+
+        for i in range(12):
+            await self.alert_manager.send_signal_alert(make_signal(f"SYM{i}"))
+
+        await asyncio.sleep(0.3)
+
+        embed_counts = [len(orjson.loads(c.kwargs['content'])['embeds'])
+                        for c in self.client.post.await_args_list]
+        assert embed_counts == [10, 2]
+
+        await self.alert_manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_flushes_pending_signals(self):
+        """Test that closing the manager sends anything still queued."""
+        self.alert_manager.max_wait_ms = 10_000
+        self.alert_manager.update_settings(telegram_bot_token="")
+
+        await self.alert_manager.send_signal_alert(make_signal('AAPL'))
+        await self.alert_manager.aclose()
+
+        assert self.client.post.await_count == 1
+        self.client.aclose.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_many_signals_sent_in_concurrent_batches(self):
+        """Test that a burst of queued signals goes out as full batches sent concurrently."""
+        self.alert_manager.update_settings(telegram_bot_token="")
+        
+        in_flight = 0
+        max_in_flight = 0
+        
+        async def slow_post(*args, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return MagicMock()
+        
+        self.client.post = AsyncMock(side_effect=slow_post)
+        
+        for i in range(25):
+            await self.alert_manager.send_signal_alert(make_signal(f"SYM{i}"))
+        await asyncio.sleep(0.02)
+        await self.alert_manager.aclose()
+        
+        embed_counts = sorted(len(orjson.loads(c.kwargs['content'])['embeds'])
+                              for c in self.client.post.await_args_list)
+        assert embed_counts == [5, 10, 10]
+        assert max_in_flight > 1
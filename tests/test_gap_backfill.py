@@ -2,7 +2,7 @@ import pytest
 import pandas as pd
 from datetime import datetime, timezone, timedelta
 from unittest.mock import Mock, AsyncMock, patch
-from app.data_access import CandleStorage
+from app.data_access import CandleStorage, _FrameCache, _fragment_frames
 from app.worker import FinnhubWorker
 import tempfile
 import os
@@ -122,26 +122,243 @@ class TestGapBackfill:
         
         assert len(result) == 5  # Candles between 25min and 50min marks
     
+    def test_time_range_spanning_month_partitions(self):
+        """Test that range reads only pick up the month partitions they overlap, and nothing is lost."""
+        symbol = "AAPL"
+        tf = "5m"
+        
+        # 2022-01-31 23:00 to 2022-02-01 00:55 UTC: 12 bars in January, 12 in February
+        start_time = datetime(2022, 1, 31, 23, 0, tzinfo=timezone.utc)
+        df = self.create_sample_candles(start_time, 24)
+        self.storage.write_candles(symbol, tf, df)
+        
+        february = datetime(2022, 2, 1, tzinfo=timezone.utc)
+        assert len(self.storage.read_candles(symbol, tf, start_time=february)) == 12
+        assert len(self.storage.read_candles(symbol, tf, end_time=february - timedelta(minutes=5))) == 12
+        
+        result = self.storage.read_candles(symbol, tf, start_time=february - timedelta(minutes=10),
+                                           end_time=february + timedelta(minutes=5))
+        assert len(result) == 4
+        assert result.index[0] == february - timedelta(minutes=10)
+
     def test_get_last_timestamp(self):
         """Test getting the last timestamp for gap detection."""
         symbol = "AAPL"
         tf = "5m"
-        
+
         # Initially no data
         last_ts = self.storage.get_last_timestamp(symbol, tf)
         assert last_ts is None
-        
+
         # Add some data
         start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
         df = self.create_sample_candles(start_time, 10)
         self.storage.write_candles(symbol, tf, df)
-        
+
         # Should get the last timestamp
         last_ts = self.storage.get_last_timestamp(symbol, tf)
         expected_last = start_time + timedelta(minutes=45)  # 9 * 5 minutes after start
-        
+
         assert last_ts == expected_last
     
+    def test_reconcile_mode_counts_changed_bars(self):
+        """Test that reconcile mode counts only changed and new bars, and keeps official values."""
+        symbol = "AAPL"
+        tf = "5m"
+
+        start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        df_live = self.create_sample_candles(start_time, 5)
+        self.storage.write_candles(symbol, tf, df_live)
+
+        # Official data: same 5 bars with 2 corrected, plus 2 new bars
+        df_official = self.create_sample_candles(start_time, 7)
+        df_official.iloc[1, df_official.columns.get_loc('c')] = 150.0
+        df_official.iloc[3, df_official.columns.get_loc('v')] = 5000
+        
+        bars_changed = self.storage.write_candles(symbol, tf, df_official, reconcile_mode=True)
+        
+        assert bars_changed == 4
+        
+        result = self.storage.read_candles(symbol, tf)
+        assert len(result) == 7
+        assert result.iloc[1]['c'] == 150.0
+        assert result.iloc[3]['v'] == 5000
+        
+        # Re-applying identical official data changes nothing
+        assert self.storage.write_candles(symbol, tf, df_official, reconcile_mode=True) == 0
+    
+    def test_append_fragments_are_compacted(self):
+        """Test that repeated appends keep the first copy of each bar and get compacted."""
+        symbol = "AAPL"
+        tf = "5m"
+        
+        start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        df = self.create_sample_candles(start_time, 5)
+        self.storage.write_candles(symbol, tf, df)
+        
+        df_later = self.create_sample_candles(start_time, 5)
+        df_later['o'] = 999.0
+        for _ in range(self.storage.max_fragments_per_partition):
+            self.storage.write_candles(symbol, tf, df_later)
+        
+        partition_dir = self.storage._get_partition_dir(symbol, tf) / "year=2022" / "month=01"
+        assert len(list(partition_dir.glob("*.parquet"))) == 1
+        
+        result = self.storage.read_candles(symbol, tf)
+        assert len(result) == 5
+        assert (result['o'] != 999.0).all()
+    
+    def test_rewritten_partition_wins_if_old_fragments_survive(self):
+        """Test that a rewrite interrupted before unlinking still reads the rewritten bars."""
+        symbol = "AAPL"
+        tf = "5m"
+        
+        start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time, 5))
+        
+        # Simulate a crash between writing the replacement and removing the old fragments
+        df_official = self.create_sample_candles(start_time, 5)
+        df_official['c'] = 150.0
+        with patch('pathlib.Path.unlink'):
+            self.storage.write_candles(symbol, tf, df_official, reconcile_mode=True)
+        
+        partition_dir = self.storage._get_partition_dir(symbol, tf) / "year=2022" / "month=01"
+        assert len(list(partition_dir.glob("*.parquet"))) == 2
+        
+        result = self.storage.read_candles(symbol, tf)
+        assert (result['c'] == 150.0).all()
+        
+        # Later appends and compaction keep the reconciled values
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time, 5))
+        self.storage.compact(symbol, tf)
+        result = self.storage.read_candles(symbol, tf)
+        assert len(result) == 5
+        assert (result['c'] == 150.0).all()
+    
+    def test_reconcile_keeps_history_when_existing_read_fails(self):
+        """Test that a failed read of the partition does not replace its history."""
+        symbol = "AAPL"
+        tf = "5m"
+        
+        start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time, 10))
+        
+        df_official = self.create_sample_candles(start_time, 2)
+        df_official['c'] = 150.0
+        with patch.object(self.storage, '_read_fragments', side_effect=OSError("boom")):
+            self.storage.write_candles(symbol, tf, df_official, reconcile_mode=True)
+        
+        result = self.storage.read_candles(symbol, tf)
+        assert len(result) == 10
+        assert (result['c'].iloc[:2] == 150.0).all()
+        assert (result['c'].iloc[2:] != 150.0).all()
+    
+    def test_read_survives_fragments_compacted_away(self):
+        """Test that a read re-lists fragments removed by a concurrent compaction."""
+        symbol = "AAPL"
+        tf = "5m"
+        
+        start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time, 5))
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time + timedelta(minutes=25), 5))
+        
+        partition_dir = self.storage._get_partition_dir(symbol, tf) / "year=2022" / "month=01"
+        stale_listing = list(partition_dir.glob("*.parquet"))
+        self.storage.compact(symbol, tf)
+        
+        result = self.storage._read_fragments(stale_listing)
+        assert len(result) == 10
+    
+    def test_fragment_appended_during_rewrite_survives(self):
+        """Test that a fragment written between a rewrite's read and its unlink is kept."""
+        symbol = "AAPL"
+        tf = "5m"
+        
+        start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time, 5))
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time + timedelta(minutes=25), 5))
+        
+        # Another writer appends right after the compaction has read the partition
+        late_candles = self.create_sample_candles(start_time + timedelta(minutes=50), 5)
+        read_fragments = self.storage._read_fragments
+        
+        def read_then_append(fragments):
+            existing = read_fragments(fragments)
+            self.storage.write_candles(symbol, tf, late_candles)
+            return existing
+        
+        with patch.object(self.storage, '_read_fragments', side_effect=read_then_append):
+            self.storage.compact(symbol, tf)
+        
+        result = self.storage.read_candles(symbol, tf)
+        assert len(result) == 15
+        assert result.index[-1] == start_time + timedelta(minutes=70)
+        
+        # Reconciliation racing with an append keeps the appended bars too
+        df_official = self.create_sample_candles(start_time, 2)
+        df_official['c'] = 150.0
+        later_candles = self.create_sample_candles(start_time + timedelta(minutes=75), 5)
+        
+        def read_then_append_later(fragments):
+            existing = read_fragments(fragments)
+            self.storage.write_candles(symbol, tf, later_candles)
+            return existing
+        
+        with patch.object(self.storage, '_read_fragments', side_effect=read_then_append_later):
+            self.storage.write_candles(symbol, tf, df_official, reconcile_mode=True)
+        
+        result = self.storage.read_candles(symbol, tf)
+        assert len(result) == 20
+        assert (result['c'].iloc[:2] == 150.0).all()
+    
+    def test_fragment_frame_cache_is_bounded_and_evicted_on_rewrite(self):
+        """Test that cached frames are capped by size and dropped when their fragments are compacted."""
+        symbol = "AAPL"
+        tf = "5m"
+        
+        start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time, 5))
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time + timedelta(minutes=25), 5))
+        self.storage.read_candles(symbol, tf)
+        
+        partition_dir = self.storage._get_partition_dir(symbol, tf) / "year=2022" / "month=01"
+        old_fragments = {str(path) for path in partition_dir.glob("*.parquet")}
+        self.storage.compact(symbol, tf)
+        assert not any(path in old_fragments for key in _fragment_frames._frames for path, _, _ in key)
+        
+        # Least recently used frames are evicted once the byte budget is exceeded
+        cache = _FrameCache(max_bytes=1000)
+        frame = self.create_sample_candles(start_time, 10).set_index('ts')
+        frame_bytes = int(frame.memory_usage(index=True).sum())
+        for i in range(1000 // frame_bytes + 2):
+            cache.put(((f"f{i}", 0, 0),), frame)
+        assert cache._bytes <= 1000
+        assert cache.get((("f0", 0, 0),)) is None
+        assert cache.get(((f"f{i}", 0, 0),)) is not None
+    
+    def test_candles_stored_with_narrow_dtypes(self):
+        """Test that prices are stored as float32 and volume as uint32."""
+        symbol = "AAPL"
+        tf = "5m"
+        
+        start_time = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.storage.write_candles(symbol, tf, self.create_sample_candles(start_time, 5))
+        
+        result = self.storage.read_candles(symbol, tf)
+        assert result[['o', 'h', 'l', 'c']].dtypes.eq('float32').all()
+        assert result['v'].dtype == 'uint32'
+        
+        # Rows whose volume cannot be represented are dropped rather than wrapped
+        df_bad = self.create_sample_candles(start_time + timedelta(minutes=25), 3)
+        df_bad['v'] = df_bad['v'].astype(float)
+        df_bad.loc[0, 'v'] = -1
+        df_bad.loc[1, 'v'] = float('nan')
+        assert self.storage.write_candles(symbol, tf, df_bad) == 1
+        
+        result = self.storage.read_candles(symbol, tf)
+        assert len(result) == 6
+        assert result['v'].iloc[-1] == df_bad['v'].iloc[2]
+    
     @pytest.mark.asyncio
     async def test_gap_detection_and_backfill(self):
         """Test that gaps are detected and backfilled correctly."""
@@ -376,6 +376,30 @@ class TestEndToEndWorkflows:
             assert len(stored_data) == 1
             assert stored_data.iloc[0]['c'] == 100.5  # Close price preserved
 
+    @pytest.mark.asyncio
+    async def test_stop_shuts_down_signal_pool(self, test_storage):
+        """Test that stop() shuts the signal pool down and start() brings up a fresh one."""
+        
+        worker = FinnhubWorker()
+        executor = worker.signal_executor
+        
+        with patch('app.worker.storage', test_storage):
+            worker.stop()
+        
+        assert worker.signal_executor is None
+        with pytest.raises(RuntimeError):
+            executor.submit(lambda: None)
+        
+        # Candles completing after stop are ignored rather than scheduled
+        worker._on_candle_completed("AAPL", {})
+        
+        with patch('app.worker.universe_manager.get_universe_symbols', AsyncMock(return_value=[])):
+            await worker.start()
+        
+        assert worker.signal_executor is not None
+        assert worker.signal_executor is not executor
+        worker.stop()
+
 
 class TestSystemPerformance:
     """Integration tests for system performance and reliability."""
@@ -1,4 +1,5 @@
 import pytest
+import pandas as pd
 from datetime import datetime, timezone
 import pytz
 
@@ -159,4 +160,19 @@ class TestUSMarketCalendar:
         expected_end_ext = et_tz.localize(datetime(2024, 1, 8, 20, 0))
         
         assert start_ext == expected_start_ext.astimezone(timezone.utc)
-        assert end_ext == expected_end_ext.astimezone(timezone.utc)
\ No newline at end of file
+        assert end_ext == expected_end_ext.astimezone(timezone.utc)
+    
+    def test_get_session_arrays_matches_scalar_methods(self):
+        """Test vectorised session lookup agrees with the per-bar methods."""
+        # Spans a weekend, the MLK holiday and pre/post-market bars
+        index = pd.date_range('2024-01-12 08:00', '2024-01-17 02:00', freq='5min', tz='UTC')
+        
+        for include_extended_hours in (False, True):
+            session_id, include_mask = self.calendar.get_session_arrays(index, include_extended_hours)
+            
+            expected_mask = [self.calendar.should_include_in_session(ts, include_extended_hours) for ts in index]
+            assert include_mask.tolist() == expected_mask
+            
+            session_opens = [self.calendar.get_session_open(ts) for ts in index]
+            for i in range(1, len(index)):
+                assert (session_id[i] != session_id[i - 1]) == (session_opens[i] != session_opens[i - 1])
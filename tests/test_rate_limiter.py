@@ -1,6 +1,7 @@
 import pytest
 import asyncio
 import time
+from collections import deque
 from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
@@ -15,8 +16,6 @@ class TestRateLimiter:
         # Create rate limiter with small limits for testing
         self.rate_limiter = RateLimiter(daily_limit=10, minute_limit=3)
         self.rate_limiter.calls_today = 0
-        self.rate_limiter.calls_this_minute = 0
-        self.rate_limiter.minute_window_start = time.time()
     
     def test_can_make_call_within_limits(self):
         """Test that calls are allowed within limits."""
@@ -40,16 +39,43 @@ class TestRateLimiter:
     def test_minute_limit_reset(self):
         """Test that minute window resets properly."""
         # Hit minute limit
-        self.rate_limiter.calls_this_minute = 3
+        for i in range(3):
+            self.rate_limiter.record_call()
         assert self.rate_limiter.can_make_call() is False
         
         # Simulate time passing
-        self.rate_limiter.minute_window_start = time.time() - 61
-        self.rate_limiter._reset_minute_window_if_needed()
+        self.rate_limiter._recent_calls = deque(t - 61 for t in self.rate_limiter._recent_calls)
         
         assert self.rate_limiter.calls_this_minute == 0
         assert self.rate_limiter.can_make_call() is True
     
+    def test_minute_window_slides(self):
+        """Test that calls stay counted for a full 60 seconds, not until a window boundary."""
+        now = time.monotonic()
+        self.rate_limiter._recent_calls = deque([now - 59, now - 30, now - 1])
+        assert self.rate_limiter.can_make_call() is False
+        
+        # Only the oldest call has to age out before the next call is allowed
+        delay = self.rate_limiter.get_delay_until_next_call()
+        assert 0 < delay <= 1
+        
+        self.rate_limiter._recent_calls[0] = now - 61
+        assert self.rate_limiter.calls_this_minute == 2
+        assert self.rate_limiter.can_make_call() is True
+    
+    def test_penalize_blocks_calls_for_retry_after(self):
+        """Test that a 429 penalty holds off calls until Retry-After has passed."""
+        self.rate_limiter.penalize(retry_after=30)
+        assert self.rate_limiter.can_make_call() is False
+        assert 29 < self.rate_limiter.get_delay_until_next_call() <= 30
+        
+        # A shorter penalty never shortens an existing one
+        self.rate_limiter.penalize(retry_after=1)
+        assert self.rate_limiter.get_delay_until_next_call() > 29
+        
+        self.rate_limiter._blocked_until = time.monotonic() - 1
+        assert self.rate_limiter.can_make_call() is True
+    
     @pytest.mark.asyncio
     async def test_acquire_with_backoff(self):
         """Test that acquire_with_backoff works correctly."""
@@ -64,7 +90,8 @@ class TestRateLimiter:
         assert self.rate_limiter.get_delay_until_next_call() == 0
         
         # Hit minute limit - should have delay
-        self.rate_limiter.calls_this_minute = 3
+        for i in range(3):
+            self.rate_limiter.record_call()
         delay = self.rate_limiter.get_delay_until_next_call()
         assert 0 < delay <= 60
         
@@ -75,8 +102,9 @@ class TestRateLimiter:
     
     def test_get_stats(self):
         """Test statistics retrieval."""
+        for i in range(2):
+            self.rate_limiter.record_call()
         self.rate_limiter.calls_today = 5
-        self.rate_limiter.calls_this_minute = 2
         
         stats = self.rate_limiter.get_stats()
         
@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+
+from app.indicators import _wilder_rsi
+
+
+# Wilder's 14-period worked example (as published by StockCharts)
+REFERENCE_CLOSES = [
+    44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10, 45.42, 45.84, 46.08,
+    45.89, 46.03, 45.61, 46.28, 46.28, 46.00, 46.03, 46.41, 46.22, 45.64,
+    46.21, 46.25, 45.71, 46.45, 45.78, 45.35, 44.03, 44.18, 44.22, 44.57,
+    43.42, 42.66, 43.13
+]
+# Published values are computed from rounded averages, so they agree to about 0.1
+REFERENCE_RSI = [
+    70.53, 66.32, 66.55, 69.41, 66.36, 57.97, 62.93, 63.26, 56.06, 62.38,
+    54.71, 50.42, 39.99, 41.46, 41.87, 45.46, 37.30, 33.08, 37.77
+]
+
+
+def loop_wilder_rsi(close, period):
+    """Straightforward loop implementation of SMA-seeded Wilder RSI (TA-Lib's definition)."""
+    out = [np.nan] * len(close)
+    if len(close) <= period:
+        return out
+    
+    gains = [max(close[i] - close[i - 1], 0.0) for i in range(1, len(close))]
+    losses = [max(close[i - 1] - close[i], 0.0) for i in range(1, len(close))]
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+    
+    for i in range(period, len(close)):
+        if i > period:
+            avg_gain = (avg_gain * (period - 1) + gains[i - 1]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[i - 1]) / period
+        out[i] = 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+    return out
+
+
+class TestWilderRSI:
+    """Test the Wilder-smoothed RSI against reference values."""
+    
+    def test_matches_published_reference(self):
+        """Test RSI(14) against Wilder's worked example."""
+        rsi = _wilder_rsi(np.array(REFERENCE_CLOSES), 14)
+        
+        assert np.isnan(rsi[:14]).all()
+        np.testing.assert_allclose(rsi[14:], REFERENCE_RSI, atol=0.1)
+    
+    def test_matches_loop_implementation(self):
+        """Test against a plain loop over a longer random walk and several periods."""
+        rng = np.random.default_rng(42)
+        close = 100 + np.cumsum(rng.normal(0, 1, 500))
+        
+        for period in (2, 9, 14, 21):
+            np.testing.assert_allclose(_wilder_rsi(close, period), loop_wilder_rsi(list(close), period),
+                                       rtol=1e-9, equal_nan=True)
+    
+    def test_all_gains_is_100(self):
+        """Test that a series with no losses has RSI 100 rather than NaN."""
+        rsi = _wilder_rsi(np.arange(1.0, 31.0), 14)
+        
+        assert np.isnan(rsi[:14]).all()
+        assert (rsi[14:] == 100.0).all()
+    
+    def test_all_losses_is_0(self):
+        """Test that a series with no gains has RSI 0."""
+        rsi = _wilder_rsi(np.arange(30.0, 0.0, -1.0), 14)
+        
+        assert (rsi[14:] == 0.0).all()
+    
+    @pytest.mark.parametrize("length", [0, 1, 13, 14])
+    def test_too_short_series_is_all_nan(self, length):
+        """Test that a series no longer than the period yields only NaN."""
+        rsi = _wilder_rsi(np.linspace(100.0, 110.0, length), 14)
+        
+        assert len(rsi) == length
+        assert np.isnan(rsi).all()